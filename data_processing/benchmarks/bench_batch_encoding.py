@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: re-encoding a batch on every attempt vs. a Batch encoded once.
+
+Simulates comment-heavy rows and the work of `attempts` sends per batch
+(first try plus retries) and a full bisection down to single rows.
+
+Usage:
+    python data_processing/benchmarks/bench_batch_encoding.py [--rows N] [--attempts N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+
+import batching
+from batching import AdaptiveBatcher
+
+COMMENT = "Ürünü çok beğendim, kargo hızlıydı ve paketleme özenliydi. " * 4
+
+def synthetic_records(rows):
+    """
+    Records shaped like product_inventory rows with a large comments blob
+    """
+    return [{
+        'product_id': str(100000000 + i),
+        'name': 'Nemlendirici Krem 50 ml',
+        'price': '1.079,98 TL',
+        'rating': 4.5,
+        'rating_count': i % 5000,
+        'comments': json.dumps([{"text": COMMENT, "rating": 5}] * 20, ensure_ascii=False),
+    } for i in range(rows)]
+
+def legacy_encode(batch):
+    return json.dumps(batch, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def legacy_cost(batches, attempts):
+    # Every attempt, and both halves at every level of a bisection, re-encode the rows
+    start = time.perf_counter()
+    for batch in batches:
+        records = batch.records
+        for _ in range(attempts):
+            legacy_encode(records)
+        parts = [records]
+        while parts:
+            part = parts.pop()
+            legacy_encode(part)
+            if len(part) > 1:
+                middle = len(part) // 2
+                parts.extend((part[:middle], part[middle:]))
+    return time.perf_counter() - start
+
+def batch_cost(batches, attempts):
+    # Attempts reuse batch.body; bisection only joins already encoded fragments
+    start = time.perf_counter()
+    for batch in batches:
+        for _ in range(attempts):
+            len(batch.body)
+        parts = [batch]
+        while parts:
+            part = parts.pop()
+            if len(part) > 1:
+                parts.extend(part.split())
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--attempts', type=int, default=3)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.rows)
+
+    start = time.perf_counter()
+    batches = list(AdaptiveBatcher().batches(records))
+    encode_time = time.perf_counter() - start
+    total_bytes = sum(batch.size for batch in batches)
+
+    print(f"Encoder: {'orjson' if batching.orjson is not None else 'json'}")
+    print(f"{len(batches)} batches, {total_bytes / 1e6:.1f} MB, initial encoding {encode_time:.3f} s")
+    print(f"Re-encode per attempt: {legacy_cost(batches, args.attempts):.3f} s")
+    print(f"Encode once (Batch):   {encode_time + batch_cost(batches, args.attempts):.3f} s")
+
+if __name__ == "__main__":
+    main()
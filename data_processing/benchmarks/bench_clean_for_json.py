@@ -0,0 +1,79 @@
+"""
+Benchmark: per-batch CPU time of the old recursive clean_for_json pass.
+
+The upload loops used to deep-copy every batch through clean_for_json before
+sending it. Records built by coercion.frame_to_records are already JSON-native,
+so that pass is now skipped; this measures what it cost per batch, for plain
+product rows and for rows that carry large parsed comment lists.
+
+Usage:
+    python data_processing/benchmarks/bench_clean_for_json.py [batch_size]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+
+from coercion import frame_to_records
+
+def clean_for_json(data):
+    """
+    The removed recursive cleaner, kept here for comparison
+    """
+    if isinstance(data, list):
+        return [clean_for_json(item) for item in data]
+    elif isinstance(data, dict):
+        return {key: clean_for_json(value) for key, value in data.items()}
+    elif isinstance(data, float) and np.isnan(data):
+        return None
+    elif isinstance(data, np.float64):
+        return float(data)
+    elif isinstance(data, np.int64):
+        return int(data)
+    else:
+        return data
+
+def product_rows(rows, comments_per_row=0):
+    """
+    Build JSON-native product records, optionally with a parsed comment list per row
+    """
+    df = pd.DataFrame({
+        'product_id': [str(100000000 + i) for i in range(rows)],
+        'name': ['Ürün adı'] * rows,
+        'rating': np.where(np.arange(rows) % 10 == 0, np.nan, 4.5),
+        'rating_count': np.arange(rows),
+        **{f'star_{i}_count': np.arange(rows) for i in range(6)},
+    })
+    records = frame_to_records(df)
+    if comments_per_row:
+        comment = {'userFullName': 'A** B**', 'rate': 5, 'comment': 'Çok güzel bir ürün ' * 10, 'date': '2025-02-07'}
+        for record in records:
+            record['comments'] = [dict(comment) for _ in range(comments_per_row)]
+    return records
+
+def per_batch_ms(records, batch_size, repeat=5):
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for batch in batches:
+            clean_for_json(batch)
+        best = min(best, time.process_time() - start)
+    return best / len(batches) * 1000
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    print(f"CPU time spent in clean_for_json per batch of {batch_size} (now skipped entirely):")
+    for comments in (0, 100, 1000):
+        records = product_rows(batch_size * 20, comments_per_row=comments)
+        label = f"{comments} comments/row"
+        print(f"  {label:<20} {per_batch_ms(records, batch_size):9.2f} ms/batch")
+
+if __name__ == "__main__":
+    main()
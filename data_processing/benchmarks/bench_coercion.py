@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: legacy per-cell coercion vs. the vectorized coercion engine.
+
+Usage:
+    python data_processing/benchmarks/bench_coercion.py [rows ...]
+
+Defaults to 1k, 100k and 1M synthetic rows.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+
+from coercion import to_json_records
+
+INTEGER_COLUMNS = [
+    'rating_count', 'total_comment_count', 'total_rating_count', 'total_pages',
+    'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
+    'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages'
+]
+FLOAT_COLUMNS = ['rating', 'rating_score']
+
+def synthetic_frame(rows, seed=0):
+    """
+    Build a frame shaped like the projected CSV, with ~10% missing numeric values
+    """
+    rng = np.random.default_rng(seed)
+    data = {
+        'product_id': rng.integers(10**8, 10**9, rows).astype(str),
+        'name': np.array(['Ürün adı'] * rows, dtype=object),
+        'price': np.array(['1.079,98 TL'] * rows, dtype=object),
+    }
+    for col in INTEGER_COLUMNS:
+        values = rng.integers(0, 10000, rows).astype('float64')
+        values[rng.random(rows) < 0.1] = np.nan
+        data[col] = values
+    for col in FLOAT_COLUMNS:
+        values = rng.uniform(0, 5, rows).round(1)
+        values[rng.random(rows) < 0.1] = np.nan
+        data[col] = values
+    return pd.DataFrame(data)
+
+def legacy_records(df):
+    """
+    The previous three-pass implementation: apply() per cell, replace(), then a record loop
+    """
+    df = df.copy()
+    for col in INTEGER_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+        df[col] = df[col].apply(lambda x: int(x) if pd.notnull(x) else None)
+    for col in FLOAT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.replace({np.nan: None})
+    json_data = df.to_dict(orient='records')
+    for record in json_data:
+        for col in INTEGER_COLUMNS:
+            if col in record and record[col] is not None:
+                record[col] = int(record[col])
+        if 'product_id' in record and record['product_id'] is not None:
+            record['product_id'] = str(record['product_id'])
+    return json_data
+
+def vectorized_records(df):
+    return to_json_records(df, INTEGER_COLUMNS, FLOAT_COLUMNS, ['product_id'])
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return time.perf_counter() - start, result
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+
+    print(f"{'rows':>10} {'legacy':>12} {'vectorized':>12} {'speedup':>9}")
+    for rows in sizes:
+        df = synthetic_frame(rows)
+        legacy_time, legacy = timed(legacy_records, df)
+        vector_time, vector = timed(vectorized_records, df)
+
+        if legacy != vector:
+            print(f"Warning: outputs differ for {rows} rows")
+        del legacy, vector
+
+        print(f"{rows:>10} {legacy_time:>10.3f} s {vector_time:>10.3f} s {legacy_time / vector_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: full CSV parse vs. projected parse (usecols + explicit dtypes)
+vs. a projected read of the memory-mapped Arrow snapshot cache.
+CSV reads report the tracemalloc peak. tracemalloc cannot see Arrow's own
+allocator or mapped pages, so cached reads report how much the process
+RSS grew during the read instead (Linux only; mapped pages are only counted
+once touched), and the two are not compared.
+
+Usage:
+    python data_processing/benchmarks/bench_csv_projection.py [path/to/snapshot.csv]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+
+from csv_reader import read_projected_csv
+from snapshot_cache import SnapshotCache
+
+DEFAULT_CSV = os.path.join(os.path.dirname(BENCH_DIR), "all_categories_20250207_031918.csv")
+
+# Column sets sent by each job
+JOBS = {
+    "update_supabase_columns": ['product_id', 'Menşei', 'RGB', 'Renk'],
+    "csv_to_supabase": [
+        'product_id', 'name', 'url', 'price', 'rating', 'rating_count',
+        'social_proof_1', 'social_proof_2', 'social_proof_3', 'social_proof_4',
+        'subcategory', 'description', 'extra_description', 'total_comment_count',
+        'rating_score', 'total_rating_count', 'total_pages',
+        'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
+        'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages'
+    ],
+}
+JOBS["complete_csv_to_supabase"] = JOBS["csv_to_supabase"] + ['Menşei', 'RGB', 'Renk']
+# --helpfulness also reads the review texts to weight ratings by likes
+JOBS["complete_csv_to_supabase --helpfulness"] = JOBS["complete_csv_to_supabase"] + ['comments']
+
+def rss_bytes():
+    """
+    Resident set size of this process, or None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def measure(label, read, repeat=3, memory="traced"):
+    """
+    Run a reader several times and report best wall time, memory and frame size.
+    memory="traced" reports the tracemalloc peak; memory="rss" reports how much
+    the resident set grew during the read (for readers that allocate
+    outside the Python allocator).
+    """
+    best = float("inf")
+    peak = 0
+    frame_bytes = 0
+    for _ in range(repeat):
+        if memory == "traced":
+            tracemalloc.start()
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        df = read()
+        elapsed = time.perf_counter() - start
+        if memory == "traced":
+            _, run_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        else:
+            rss_after = rss_bytes()
+            run_peak = rss_after - rss_before if rss_before is not None else None
+
+        best = min(best, elapsed)
+        peak = None if run_peak is None else max(peak, run_peak)
+        frame_bytes = int(df.memory_usage(deep=True).sum())
+        del df
+
+    if peak is None:
+        memory_text = "memory n/a"
+    elif memory == "traced":
+        memory_text = f"peak {peak / 2**20:8.1f} MiB"
+    else:
+        memory_text = f"rss +{peak / 2**20:7.1f} MiB"
+    print(f"{label:<50} {best * 1000:9.1f} ms  {memory_text}  frame {frame_bytes / 2**20:8.1f} MiB")
+    return best, peak
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    print(f"CSV: {csv_path} ({os.path.getsize(csv_path) / 2**20:.1f} MiB)\n")
+
+    full_time, full_peak = measure("full read (all columns)", lambda: pd.read_csv(csv_path, low_memory=False))
+
+    for job, columns in JOBS.items():
+        job_time, job_peak = measure(f"projected: {job}", lambda: read_projected_csv(csv_path, columns))
+        print(f"{'':<50} {full_time / job_time:9.1f}x faster, {full_peak / max(job_peak, 1):5.1f}x less peak memory")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = SnapshotCache(cache_dir)
+        if not cache.available:
+            print("\npyarrow is not installed; skipping the snapshot cache")
+            return
+        start = time.perf_counter()
+        cache.build(csv_path)
+        print(f"{'cache build (one-off)':<50} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+        for job, columns in JOBS.items():
+            job_time, _ = measure(f"cached: {job}", lambda: cache.read(csv_path, columns), memory="rss")
+            print(f"{'':<50} {full_time / job_time:9.1f}x faster")
+
+if __name__ == "__main__":
+    main()
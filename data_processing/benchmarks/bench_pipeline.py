@@ -0,0 +1,103 @@
+"""
+Benchmark: sequential stages vs. the staged pipeline (parse -> normalize -> serialize -> send).
+
+Runs against the local PostgREST stand-in. The sequential run finishes each
+stage before starting the next, like the non-streaming mode of
+complete_csv_to_supabase.py; the pipelined run overlaps them.
+
+Usage:
+    python data_processing/benchmarks/bench_pipeline.py [--latency 0.05] [--repeat 5] [--csv path]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+
+from batching import AdaptiveBatcher
+from coercion import to_json_records
+from csv_reader import read_projected_csv
+from pipeline import StagedPipeline
+from postgrest_stub import PostgrestStub
+from ratelimit import AimdRateLimiter
+from uploader import ConcurrentUploader
+
+from bench_uploader import COLUMNS, DEFAULT_CSV
+
+INTEGER_COLUMNS = [c for c in COLUMNS if c.endswith('_count') or c.startswith('total_')]
+
+def normalize(chunk):
+    return to_json_records(chunk, INTEGER_COLUMNS, ['rating', 'rating_score'], ['product_id'])
+
+def chunks(csv_paths, chunk_size):
+    # Repeating the snapshot stands in for a larger export
+    for path in csv_paths:
+        yield from read_projected_csv(path, COLUMNS, chunksize=chunk_size)
+
+def uploader_for(server):
+    # A generous rate limiter so the stand-in's latency is what limits sending
+    return ConcurrentUploader(server.url, "local", "product_inventory", max_in_flight=4,
+                              batcher=AdaptiveBatcher(max_rows=100), rate_limiter=AimdRateLimiter(rate=500))
+
+def sequential(csv_paths, server, chunk_size):
+    timings = {}
+    start = time.perf_counter()
+    frames = list(chunks(csv_paths, chunk_size))
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = [record for frame in frames for record in normalize(frame)]
+    timings["normalize"] = time.perf_counter() - start
+
+    with uploader_for(server) as uploader:
+        start = time.perf_counter()
+        batches = list(uploader.encode_batches(records))
+        timings["serialize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        uploader.upload_batches(batches)
+        timings["send"] = time.perf_counter() - start
+    return timings
+
+def pipelined(csv_paths, server, chunk_size):
+    pipeline = StagedPipeline()
+    start = time.perf_counter()
+    frames = pipeline.stage("parse", chunks(csv_paths, chunk_size))
+    record_lists = pipeline.stage("normalize", map(normalize, frames))
+    records = (record for records in record_lists for record in records)
+    with uploader_for(server) as uploader:
+        batches = pipeline.stage("serialize", uploader.encode_batches(records))
+        uploader.upload_batches(batches)
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    return elapsed, pipeline.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5, help="Times the snapshot is streamed per run")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    server = PostgrestStub(latency=args.latency).start()
+    csv_paths = [args.csv] * args.repeat
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        timings = sequential(csv_paths, server, args.chunk_size)
+        elapsed, summary = pipelined(csv_paths, server, args.chunk_size)
+
+    total = sum(timings.values())
+    print("Sequential stages: " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in timings.items()))
+    print(f"  sum {total:.2f} s, slowest stage {max(timings.values()):.2f} s")
+    print(f"Pipelined: {elapsed:.2f} s ({total / elapsed:.1f}x faster)")
+    print(f"  {summary}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: upload throughput against the local PostgREST stand-in.
+
+Compares the old one-batch-at-a-time loop (including its fixed 1 s sleep)
+with the concurrent uploader at several in-flight limits. With --server-rate
+the stand-in answers 429 above that many requests per second, which shows the
+AIMD rate limiter settling at the backend's limit. With --poison-rows some
+records are made invalid, which exercises bisection and quarantine. The last
+rows compare return=minimal (count-verified) with return=representation.
+
+Usage:
+    python data_processing/benchmarks/bench_uploader.py [--latency 0.2] [--server-rate 20] [--csv path]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+
+from batching import AdaptiveBatcher
+from coercion import to_json_records
+from csv_reader import read_projected_csv
+from postgrest_stub import PostgrestStub
+from uploader import ConcurrentUploader, RETURN_MINIMAL, RETURN_REPRESENTATION
+
+DEFAULT_CSV = os.path.join(os.path.dirname(BENCH_DIR), "all_categories_20250207_031918.csv")
+
+COLUMNS = [
+    'product_id', 'name', 'url', 'price', 'rating', 'rating_count',
+    'social_proof_1', 'social_proof_2', 'social_proof_3', 'social_proof_4',
+    'subcategory', 'description', 'extra_description', 'total_comment_count',
+    'rating_score', 'total_rating_count', 'total_pages',
+    'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
+    'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages',
+    'Menşei', 'RGB', 'Renk'
+]
+
+def run(records, server, max_in_flight, batch_rows, return_mode=RETURN_MINIMAL):
+    batcher = AdaptiveBatcher(max_rows=batch_rows)
+    start = time.perf_counter()
+    # Silence per-batch progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ConcurrentUploader(server.url, "local", "product_inventory", max_in_flight=max_in_flight,
+                                batcher=batcher, return_mode=return_mode) as uploader:
+            successful, failed = uploader.upload(records, total_records=len(records))
+    return time.perf_counter() - start, successful, failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated server latency per request")
+    parser.add_argument("--batch-rows", type=int, default=50)
+    parser.add_argument("--poison-rows", type=int, default=0, help="Number of records the stand-in will reject")
+    parser.add_argument("--server-rate", type=float, default=None, help="Requests per second the stand-in accepts")
+    args = parser.parse_args()
+
+    records = to_json_records(
+        read_projected_csv(args.csv, COLUMNS),
+        integer_columns=[c for c in COLUMNS if c.endswith('_count') or c.startswith('total_')],
+        float_columns=['rating', 'rating_score'],
+        string_columns=['product_id'],
+    )
+    # Spread poison records evenly; the stand-in rejects NUL characters like Postgres does
+    for i in range(args.poison_rows):
+        records[i * len(records) // args.poison_rows]['Renk'] = "bad\x00value"
+
+    server = PostgrestStub(latency=args.latency, max_rate=args.server_rate).start()
+    batches = (len(records) + args.batch_rows - 1) // args.batch_rows
+
+    # The previous loops sent one batch at a time and slept 1 s after each
+    legacy = batches * (args.latency + 1.0)
+    print(f"{len(records)} records, {batches} batches of {args.batch_rows}, {args.latency * 1000:.0f} ms server latency\n")
+    print(f"{'sequential + sleep(1) (estimated)':<36} {legacy:7.2f} s  {len(records) / legacy:8.0f} rows/s")
+
+    for max_in_flight in (1, 4, 8, 16):
+        throttled_before = server.throttled
+        elapsed, successful, failed = run(records, server, max_in_flight, args.batch_rows)
+        label = f"concurrent, {max_in_flight} in flight"
+        print(f"{label:<36} {elapsed:7.2f} s  {successful / elapsed:8.0f} rows/s  "
+              f"({failed} failed, {server.throttled - throttled_before} throttled)")
+
+    print()
+    for return_mode in (RETURN_REPRESENTATION, RETURN_MINIMAL):
+        elapsed, successful, failed = run(records, server, 4, args.batch_rows, return_mode)
+        label = f"return={return_mode}, 4 in flight"
+        print(f"{label:<36} {elapsed:7.2f} s  {successful / elapsed:8.0f} rows/s  ({failed} failed)")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Minimal local stand-in for the PostgREST endpoints used by the upload scripts.
+
+It accepts upserts on /rest/v1/<table>, keeps rows in memory keyed by the
+on_conflict column (product_id by default) and can add artificial latency and
+a request rate limit (answered with 429 + Retry-After), so upload throughput
+can be measured offline. Like Postgres, it rejects a whole batch with 400 when
+any text value contains a NUL character.
+
+Usage:
+    python data_processing/benchmarks/postgrest_stub.py [--port 54321] [--latency 0.2] [--max-rate 20]
+
+Then point the scripts at it with SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class PostgrestStub(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding upserted rows per table
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, max_rate=None):
+        super().__init__(address, PostgrestHandler)
+        self.latency = latency
+        self.max_rate = max_rate
+        self.tables = {}
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self._allowance = max_rate or 0.0
+        self._checked = time.monotonic()
+
+    def admit(self):
+        """
+        Server-side token bucket; False when the request exceeds max_rate
+        """
+        if not self.max_rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._allowance = min(self.max_rate, self._allowance + (now - self._checked) * self.max_rate)
+            self._checked = now
+            if self._allowance < 1:
+                self.throttled += 1
+                return False
+            self._allowance -= 1
+            return True
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serve from a daemon thread and return the server
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _table(self):
+        parsed = urlparse(self.path)
+        return parsed.path.rsplit("/", 1)[-1], parse_qs(parsed.query)
+
+    def _reply(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        table, query = self._table()
+        key = query.get("on_conflict", ["product_id"])[0]
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if not self.server.admit():
+            self._reply(429, {"message": "Too many requests"}, {"Retry-After": "1"})
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        try:
+            rows = json.loads(body)
+        except ValueError as e:
+            self._reply(400, {"message": f"Invalid JSON: {e}"})
+            return
+        rows = rows if isinstance(rows, list) else [rows]
+
+        if any(isinstance(value, str) and "\x00" in value for row in rows for value in row.values()):
+            self._reply(400, {"code": "22P05", "message": "unsupported Unicode escape sequence"})
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+            stored = self.server.tables.setdefault(table, {})
+            for row in rows:
+                stored.setdefault(row.get(key), {}).update(row)
+
+        prefer = self.headers.get("Prefer", "")
+        payload = rows if "return=representation" in prefer else None
+        headers = {"Content-Range": f"*/{len(rows)}"} if "count=exact" in prefer else None
+        self._reply(201, payload, headers)
+
+    def do_GET(self):
+        table, _ = self._table()
+        if not table:
+            self._reply(200, self._openapi())
+            return
+        with self.server.lock:
+            rows = list(self.server.tables.get(table, {}).values())[:1]
+        self._reply(200, rows)
+
+    def _openapi(self):
+        """
+        OpenAPI description listing every table and column seen so far
+        """
+        with self.server.lock:
+            definitions = {
+                name: {"properties": {col: {} for row in rows.values() for col in row}}
+                for name, rows in self.server.tables.items()
+            }
+        return {"swagger": "2.0", "definitions": definitions}
+
+    def do_DELETE(self):
+        self._reply(204)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in for upload benchmarks")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of artificial latency per upsert")
+    parser.add_argument("--max-rate", type=float, default=None, help="Upserts per second before answering 429")
+    args = parser.parse_args()
+
+    server = PostgrestStub(("127.0.0.1", args.port), latency=args.latency, max_rate=args.max_rate)
+    print(f"PostgREST stand-in listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
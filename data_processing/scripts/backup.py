@@ -0,0 +1,127 @@
+import gzip
+import io
+import itertools
+import json
+import os
+
+from batching import encode_record
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst backups
+    zstandard = None
+
+# Backup compression, chosen by file suffix
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+def backup_path(directory, name, compression=None):
+    """
+    Path of an NDJSON backup file, with the suffix of its compression
+    """
+    return os.path.join(directory, f"{name}.ndjson{COMPRESSION_SUFFIXES[compression]}")
+
+def _compression_of(path):
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and path.endswith(suffix):
+            return compression
+    return None
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("zstd backups need the zstandard package (pip install zstandard)")
+
+def _open_binary(path, mode, compression):
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == "zstd":
+        _require_zstandard()
+        if mode == 'wb':
+            return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, mode)
+
+class NdjsonBackupWriter:
+    """
+    Streaming backup sink: one JSON record per line, optionally gzip or zstd compressed.
+
+    Records are written as they flow past (see tee()), so a backup never needs
+    the full record list in memory. The file is written under a .partial name
+    and only renamed to its final path when the writer closes cleanly, so an
+    interrupted run cannot leave a truncated file that looks complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.count = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = _open_binary(self.partial_path, 'wb', _compression_of(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(complete=exc_type is None)
+
+    def write(self, record):
+        self.file.write(encode_record(record) + b"\n")
+        self.count += 1
+
+    def tee(self, records):
+        """
+        Lazily write every record to the backup while passing it on unchanged
+        """
+        for record in records:
+            self.write(record)
+            yield record
+
+    def close(self, complete=True):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if complete:
+            os.replace(self.partial_path, self.path)
+
+def _iter_json_array(text, chunk_size=1 << 20):
+    """
+    Incrementally decode the objects of a top-level JSON array whose '[' was already read
+    """
+    decoder = json.JSONDecoder()
+    buffer = text.read(chunk_size)
+    pos = 0
+    eof = False
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if buffer.startswith(']', pos):
+            return
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            chunk = text.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield record
+
+def iter_backup_records(path):
+    """
+    Stream the records of a backup back, decompressing by file suffix.
+    Reads NDJSON backups as well as the indented JSON arrays written by older runs.
+    """
+    with _open_binary(path, 'rb', _compression_of(path)) as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8')
+        first = text.read(1)
+        while first.isspace():
+            first = text.read(1)
+        if first == '[':
+            yield from _iter_json_array(text)
+            return
+        for line in itertools.chain([first + text.readline()], text):
+            if line.strip():
+                yield json.loads(line)
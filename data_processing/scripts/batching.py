@@ -0,0 +1,127 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+# Defaults tuned for PostgREST behind Supabase: requests of ~1 MB upload quickly,
+# while multi-megabyte bodies of comment-heavy rows risk gateway timeouts.
+DEFAULT_TARGET_BYTES = 1_000_000
+DEFAULT_MAX_ROWS = 500
+DEFAULT_MIN_BYTES = 64_000
+DEFAULT_MAX_BYTES = 8_000_000
+DEFAULT_TARGET_LATENCY = 2.0
+
+def encode_record(record):
+    """
+    Serialize a JSON-native record to compact UTF-8 JSON bytes, with orjson when available
+    """
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class Batch:
+    """
+    A batch of records together with its request body, serialized exactly once.
+
+    The body is assembled from per-record JSON fragments, so retries reuse it
+    as-is and split() builds both halves without encoding anything again.
+    Iterating a Batch yields its records.
+    """
+
+    def __init__(self, records, fragments, key='product_id'):
+        self.records = records
+        self.fragments = fragments
+        self.key = key
+        self.body = b'[' + b','.join(fragments) + b']'
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    @property
+    def size(self):
+        return len(self.body)
+
+    @property
+    def keys(self):
+        return [str(record.get(self.key)) for record in self.records]
+
+    @property
+    def key_range(self):
+        first, last = self.records[0].get(self.key), self.records[-1].get(self.key)
+        return str(first) if len(self.records) == 1 else f"{first}..{last}"
+
+    def split(self):
+        """
+        Split into two halves that reuse this batch's encoded fragments
+        """
+        middle = len(self.records) // 2
+        return (Batch(self.records[:middle], self.fragments[:middle], self.key),
+                Batch(self.records[middle:], self.fragments[middle:], self.key))
+
+class AdaptiveBatcher:
+    """
+    Pack records into batches bounded by a serialized byte budget and a row ceiling.
+
+    The byte budget adapts to observed request latency: fast requests grow it
+    additively, slow or failed requests shrink it multiplicatively, so batch
+    sizes settle where requests finish comfortably inside target_latency.
+    """
+
+    def __init__(self, target_bytes=DEFAULT_TARGET_BYTES, max_rows=DEFAULT_MAX_ROWS,
+                 min_bytes=DEFAULT_MIN_BYTES, max_bytes=DEFAULT_MAX_BYTES,
+                 target_latency=DEFAULT_TARGET_LATENCY, key='product_id'):
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.target_latency = target_latency
+        self.key = key
+        self.target_bytes = self._clamp(target_bytes)
+
+    def _clamp(self, value):
+        return int(min(self.max_bytes, max(self.min_bytes, value)))
+
+    def batches(self, records):
+        """
+        Lazily pack an iterable of records into Batch objects, encoding each record once.
+        A single record larger than the budget is sent on its own, and a new
+        batch is started whenever the column set changes, since PostgREST
+        requires every object in a bulk request to have the same keys.
+        """
+        batch = []
+        fragments = []
+        batch_bytes = 0
+        batch_columns = None
+
+        for record in records:
+            fragment = encode_record(record)
+            size = len(fragment) + 1
+            columns = record.keys()
+            # The budget is read for every record so latency feedback applies to the open batch
+            if batch and (batch_bytes + size > self.target_bytes or len(batch) >= self.max_rows
+                          or columns != batch_columns):
+                yield Batch(batch, fragments, self.key)
+                batch = []
+                fragments = []
+                batch_bytes = 0
+            if not batch:
+                batch_columns = columns
+            batch.append(record)
+            fragments.append(fragment)
+            batch_bytes += size
+
+        if batch:
+            yield Batch(batch, fragments, self.key)
+
+    def record_latency(self, seconds, success=True):
+        """
+        Adjust the byte budget from the latency (and outcome) of a finished request
+        """
+        if not success or seconds > self.target_latency:
+            self.target_bytes = self._clamp(self.target_bytes / 2)
+        elif seconds < self.target_latency / 2:
+            self.target_bytes = self._clamp(self.target_bytes + self.min_bytes)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+
+# Turkish month names used in the review and Q&A dates ("12 Kasım 2024")
+TURKISH_MONTHS = {
+    'ocak': 1, 'şubat': 2, 'mart': 3, 'nisan': 4, 'mayıs': 5, 'haziran': 6,
+    'temmuz': 7, 'ağustos': 8, 'eylül': 9, 'ekim': 10, 'kasım': 11, 'aralık': 12,
+}
+
+# Table definitions; run once in the Supabase SQL editor before the first load
+PRODUCT_REVIEWS_DDL = """
+CREATE TABLE IF NOT EXISTS product_reviews (
+    review_key TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    user_full_name TEXT,
+    rating SMALLINT,
+    comment TEXT,
+    review_date DATE,
+    is_trusted BOOLEAN,
+    likes INTEGER
+);
+CREATE INDEX IF NOT EXISTS product_reviews_product_id_idx ON product_reviews (product_id);
+"""
+
+PRODUCT_QUESTIONS_DDL = """
+CREATE TABLE IF NOT EXISTS product_questions (
+    question_id BIGINT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    question_text TEXT,
+    question_date DATE,
+    answer_text TEXT,
+    answer_date DATE,
+    merchant_name TEXT,
+    merchant_id BIGINT
+);
+CREATE INDEX IF NOT EXISTS product_questions_product_id_idx ON product_questions (product_id);
+"""
+
+def parse_turkish_date(text):
+    """
+    Convert a date like "12 Kasım 2024" to ISO format ("2024-11-12"), or None
+    """
+    if not text:
+        return None
+    parts = str(text).split()
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[2].isdigit():
+        return None
+    month = TURKISH_MONTHS.get(parts[1].replace('I', 'ı').replace('İ', 'i').lower())
+    if month is None:
+        return None
+    return f"{int(parts[2]):04d}-{month:02d}-{int(parts[0]):02d}"
+
+def _as_int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _parse_cell(text):
+    if not text:
+        return []
+    try:
+        items = json.loads(text)
+    except ValueError:
+        return []
+    return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+
+def review_key(product_id, review):
+    """
+    Natural key of a review, which has no id of its own: a hash of its product, author, date and text
+    """
+    parts = [str(product_id), str(review.get('userFullName')), str(review.get('date')), str(review.get('comment'))]
+    return hashlib.blake2b("\x1f".join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+def explode_reviews(product_id, comments_text):
+    """
+    Turn one product's comments cell into product_reviews rows
+    """
+    for review in _parse_cell(comments_text):
+        yield {
+            'review_key': review_key(product_id, review),
+            'product_id': str(product_id),
+            'user_full_name': review.get('userFullName'),
+            'rating': _as_int(review.get('rate')),
+            'comment': review.get('comment'),
+            'review_date': parse_turkish_date(review.get('date')),
+            'is_trusted': review.get('is_trusted'),
+            'likes': _as_int(review.get('likes')),
+        }
+
+def explode_questions(product_id, questions_text):
+    """
+    Turn one product's questions cell into product_questions rows (questions without an id are skipped)
+    """
+    for question in _parse_cell(questions_text):
+        question_id = _as_int(question.get('question_id'))
+        if question_id is None:
+            continue
+        yield {
+            'question_id': question_id,
+            'product_id': str(product_id),
+            'question_text': question.get('question_text'),
+            'question_date': parse_turkish_date(question.get('question_date')),
+            'answer_text': question.get('answer_text'),
+            'answer_date': parse_turkish_date(question.get('answer_date')),
+            'merchant_name': question.get('merchant_name'),
+            'merchant_id': _as_int(question.get('merchant_id')),
+        }
+
+REVIEW_COLUMNS = ['review_key', 'product_id', 'user_full_name', 'rating', 'comment',
+                  'review_date', 'is_trusted', 'likes']
+
+QUESTION_COLUMNS = ['question_id', 'product_id', 'question_text', 'question_date',
+                    'answer_text', 'answer_date', 'merchant_name', 'merchant_id']
+
+class ChildTable:
+    """
+    How one blob column of the snapshot is normalized into its own Supabase table
+    """
+
+    def __init__(self, table, key, column, columns, explode, ddl):
+        self.table = table
+        self.key = key
+        self.column = column
+        self.columns = columns
+        self.explode = explode
+        self.ddl = ddl
+        self.duplicates = 0
+
+    def records(self, chunks):
+        """
+        Explode the blob column of a stream of DataFrame chunks into child rows.
+        Rows whose key was already produced are dropped, since one bulk upsert
+        cannot touch the same row twice.
+        """
+        seen = set()
+        for chunk in chunks:
+            present = chunk[self.column].notna().to_numpy()
+            for product_id, text, ok in zip(chunk['product_id'].to_numpy(dtype=object),
+                                            chunk[self.column].to_numpy(dtype=object), present):
+                if not ok:
+                    continue
+                for row in self.explode(product_id, text):
+                    if row[self.key] in seen:
+                        self.duplicates += 1
+                        continue
+                    seen.add(row[self.key])
+                    yield row
+
+def child_tables():
+    """
+    The child tables loaded from the comments and questions columns
+    """
+    return [
+        ChildTable('product_reviews', 'review_key', 'comments', REVIEW_COLUMNS, explode_reviews,
+                   PRODUCT_REVIEWS_DDL),
+        ChildTable('product_questions', 'question_id', 'questions', QUESTION_COLUMNS, explode_questions,
+                   PRODUCT_QUESTIONS_DDL),
+    ]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+def coerce_frame(df, integer_columns=(), float_columns=(), string_columns=()):
+    """
+    Coerce columns to nullable pandas dtypes in a vectorized way.
+
+    Integer columns become Int64 (fractional values are truncated, like int()),
+    float columns become Float64 and string columns become strings. Values that
+    cannot be parsed become <NA>. Columns not present in the frame are ignored.
+    """
+    df = df.copy()
+
+    for col in integer_columns:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce').astype('float64')
+            df[col] = pd.Series(np.trunc(values), index=df.index).astype('Int64')
+
+    for col in float_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Float64')
+
+    for col in string_columns:
+        if col in df.columns:
+            df[col] = df[col].astype('string')
+
+    return df
+
+def column_to_json_values(series):
+    """
+    Convert a column to an object array of JSON-native values (int, float, str, None)
+    """
+    mask = series.isna().to_numpy()
+
+    if pd.api.types.is_integer_dtype(series.dtype):
+        values = series.to_numpy(dtype='int64', na_value=0).astype(object)
+    elif pd.api.types.is_float_dtype(series.dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan).astype(object)
+    elif pd.api.types.is_bool_dtype(series.dtype):
+        values = series.to_numpy(dtype='bool', na_value=False).astype(object)
+    else:
+        values = series.to_numpy(dtype=object, na_value=None)
+
+    values[mask] = None
+    return values
+
+def frame_to_records(df):
+    """
+    Convert a DataFrame to a list of dicts holding only JSON-native values.
+
+    This is the single normalization stage for upload records: missing values
+    become None and numpy scalars become Python int/float/str, so batches can
+    be serialized as-is without another cleaning pass.
+    """
+    columns = list(df.columns)
+    arrays = [column_to_json_values(df[col]) for col in columns]
+    return [dict(zip(columns, row)) for row in zip(*arrays)]
+
+def to_json_records(df, integer_columns=(), float_columns=(), string_columns=()):
+    """
+    Coerce column types and emit JSON-ready records in a single pass
+    """
+    return frame_to_records(coerce_frame(df, integer_columns, float_columns, string_columns))
@@ -1,11 +1,26 @@
+import argparse
 import pandas as pd
-import json
 import os
-from supabase import create_client, Client
+import sys
 from dotenv import load_dotenv
-import time
-import numpy as np
 from datetime import datetime
+from snapshot_cache import SnapshotCache, read_snapshot
+from coercion import to_json_records
+from batching import AdaptiveBatcher, DEFAULT_TARGET_BYTES, DEFAULT_MAX_ROWS
+from uploader import ConcurrentUploader, DEFAULT_MAX_IN_FLIGHT
+from delta_sync import SyncState, group_by_columns
+from journal import UploadJournal, file_fingerprint
+from schema import check_columns, drop_columns
+from pipeline import StagedPipeline, DEFAULT_QUEUE_SIZE
+from backup import NdjsonBackupWriter, backup_path, COMPRESSION_SUFFIXES
+from sidecar import BlobSidecarWriter, BLOB_COLUMNS
+from child_tables import child_tables
+from price import add_price_columns, PRICE_COLUMNS, PRICE_COLUMNS_DDL
+from social_proof import add_social_proof_columns, SOCIAL_PROOF_COLUMNS, SOCIAL_PROOF_COLUMNS_DDL
+from ratings import (rating_features, helpfulness_scores, RATING_COLUMNS, RATING_COLUMNS_DDL, HELPFULNESS_COLUMNS,
+                     HELPFULNESS_COLUMNS_DDL)
+from subcategory_summary import (subcategory_aggregates, SUMMARY_TABLE, SUMMARY_COLUMNS, SUMMARY_INPUT_COLUMNS,
+                                 SUBCATEGORY_SUMMARY_DDL, DEFAULT_TOP_N)
 
 # Load environment variables
 load_dotenv()
@@ -23,207 +38,227 @@ OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def read_and_process_csv():
+# Cached PostgREST schema description, shared with update_supabase_columns.py
+SCHEMA_CACHE_PATH = os.path.join(OUTPUT_DIR, "schema_cache.json")
+
+# Typed Arrow copies of parsed CSV snapshots, shared by all upload scripts (None disables the cache)
+snapshot_cache_dir = os.path.join(OUTPUT_DIR, "snapshot_cache")
+
+# Number of CSV rows parsed at a time in streaming mode
+DEFAULT_CHUNK_SIZE = 500
+
+# Define the columns that exist in the Supabase table and are in our CSV
+# Include all columns, including the additional ones
+VALID_COLUMNS = [
+    'product_id', 'name', 'url', 'price', 'rating', 'rating_count',
+    'social_proof_1', 'social_proof_2', 'social_proof_3', 'social_proof_4',
+    'subcategory', 'description', 'extra_description', 'total_comment_count',
+    'rating_score', 'total_rating_count', 'total_pages',
+    'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
+    'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages',
+    'Menşei', 'RGB', 'Renk'  # Additional columns
+]
+
+# Columns derived during processing and uploaded next to the CSV columns,
+# with the SQL that adds each group to the table
+DERIVED_COLUMNS = [
+    (PRICE_COLUMNS, PRICE_COLUMNS_DDL),
+    (SOCIAL_PROOF_COLUMNS, SOCIAL_PROOF_COLUMNS_DDL),
+    (RATING_COLUMNS, RATING_COLUMNS_DDL),
+]
+
+# Opt-in (--helpfulness): the likes-weighted review score needs the multi-MB comments
+# column, which the default read never touches
+HELPFULNESS_DERIVED = (HELPFULNESS_COLUMNS, HELPFULNESS_COLUMNS_DDL)
+
+# Read from the CSV only to derive the helpfulness score; never uploaded as-is
+HELPFULNESS_SOURCE_COLUMNS = ['comments']
+
+# Set from --helpfulness
+compute_helpfulness = False
+
+# Define which columns should be integers (based on your Supabase schema)
+INTEGER_COLUMNS = [
+    'rating_count', 'total_comment_count', 'total_rating_count', 'total_pages',
+    'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
+    'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages'
+]
+
+# Define which columns should be floats/numeric
+FLOAT_COLUMNS = ['rating', 'rating_score']
+
+def process_dataframe(df):
     """
-    Read the CSV file, process all columns, and prepare for Supabase upload
+    Filter and coerce a (possibly partial) CSV DataFrame into upload-ready records
     """
-    print(f"Reading CSV file: {csv_file_path}")
-    
-    # Read the CSV file
-    df = pd.read_csv(csv_file_path, low_memory=False)
-    
     # Clean up column names (remove whitespace, etc.)
     df.columns = df.columns.str.strip()
     
-    # Define the columns that exist in the Supabase table and are in our CSV
-    # Include all columns, including the additional ones
-    valid_columns = [
-        'product_id', 'name', 'url', 'price', 'rating', 'rating_count',
-        'social_proof_1', 'social_proof_2', 'social_proof_3', 'social_proof_4',
-        'subcategory', 'description', 'extra_description', 'total_comment_count',
-        'rating_score', 'total_rating_count', 'total_pages',
-        'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
-        'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages',
-        'Menşei', 'RGB', 'Renk'  # Additional columns
-    ]
+    # Rating features from the star histogram; the helpfulness score is computed before the comments are dropped
+    ratings = rating_features(df)
+    if compute_helpfulness:
+        ratings = pd.concat([ratings, helpfulness_scores(df['comments'])], axis=1)
     
     # Filter DataFrame to only include valid columns that exist in both CSV and Supabase
-    existing_valid_columns = [col for col in valid_columns if col in df.columns]
+    existing_valid_columns = [col for col in VALID_COLUMNS if col in df.columns]
     df = df[existing_valid_columns]
     
-    # Define which columns should be integers (based on your Supabase schema)
-    integer_columns = [
-        'rating_count', 'total_comment_count', 'total_rating_count', 'total_pages',
-        'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
-        'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages'
-    ]
-    
-    # Define which columns should be floats/numeric
-    float_columns = ['rating', 'rating_score']
-    
-    # Convert integer columns to integers
-    for col in integer_columns:
-        if col in df.columns:
-            # First convert to float (to handle NaN values), then to int, replacing NaN with None
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            # Convert float values to integers
-            df[col] = df[col].apply(lambda x: int(x) if pd.notnull(x) else None)
-    
-    # Convert float columns to floats
-    for col in float_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Replace NaN values with None (will become null in JSON)
-    df = df.replace({np.nan: None})
-    
-    # Convert DataFrame to list of dictionaries (JSON records)
-    json_data = df.to_dict(orient='records')
-    
-    # Ensure integer values are properly serialized as integers
-    for record in json_data:
-        for col in integer_columns:
-            if col in record and record[col] is not None:
-                record[col] = int(record[col])
-        
-        # Ensure product_id is a string for compatibility with Supabase
-        if 'product_id' in record and record['product_id'] is not None:
-            record['product_id'] = str(record['product_id'])
+    # Parse the display price ("1.079,98 TL") into integer kuruş and a currency code
+    df = add_price_columns(df)
+    
+    # Parse "3959 kişi favoriledi!"-style texts into counters and blank out repeated slots
+    df = add_social_proof_columns(df)
+    
+    df = pd.concat([df, ratings], axis=1)
+    
+    # Coerce types with nullable Int64/Float64 dtypes and emit JSON-ready records in one pass.
+    # product_id is kept as a string for compatibility with Supabase.
+    json_data = to_json_records(df, INTEGER_COLUMNS, FLOAT_COLUMNS, ['product_id'])
+    
+    return json_data
+
+def read_columns(sidecar=None):
+    """
+    Columns read from the CSV: the uploaded ones, plus comments when the helpfulness score
+    is computed and the blob columns when a side-car is written
+    """
+    extra = (HELPFULNESS_SOURCE_COLUMNS if compute_helpfulness else []) + (BLOB_COLUMNS if sidecar is not None else [])
+    return VALID_COLUMNS + [col for col in dict.fromkeys(extra) if col not in VALID_COLUMNS]
+
+def split_blobs(df, sidecar=None):
+    """
+    Move the comments/questions cells of a chunk into the side-car file.
+    process_dataframe drops those columns, so they never reach the upload records.
+    """
+    if sidecar is not None:
+        sidecar.write_frame(df)
+    return df
+
+def read_and_process_csv(sidecar=None):
+    """
+    Read the CSV file, process all columns, and prepare for Supabase upload
+    """
+    print(f"Reading CSV file: {csv_file_path}")
+    
+    # Read only the columns we upload, from the snapshot cache when it is current
+    df = split_blobs(read_snapshot(csv_file_path, read_columns(sidecar), cache_dir=snapshot_cache_dir), sidecar)
+    
+    json_data = process_dataframe(df)
     
     print(f"Processed {len(json_data)} records from CSV")
     return json_data
 
-def clean_for_json(data):
+def iter_pipelined_records(pipeline, chunk_size=DEFAULT_CHUNK_SIZE, sidecar=None):
     """
-    Clean data for JSON serialization
+    Stream the CSV file in bounded chunks and return an iterator of upload-ready
+    records. CSV parsing and record normalization each run on their own
+    pipeline stage, so only a few chunks are held in memory and they overlap
+    with encoding and sending.
     """
-    if isinstance(data, list):
-        return [clean_for_json(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: clean_for_json(value) for key, value in data.items()}
-    elif isinstance(data, float) and np.isnan(data):
-        return None
-    elif isinstance(data, np.float64):
-        return float(data)
-    elif isinstance(data, np.int64):
-        return int(data)
-    else:
-        return data
+    print(f"Streaming CSV file: {csv_file_path} (chunks of {chunk_size} rows, pipelined)")
+    
+    # Blob cells are written to the side-car on the parse stage, as soon as a chunk is read
+    chunks = read_snapshot(csv_file_path, read_columns(sidecar), chunksize=chunk_size, cache_dir=snapshot_cache_dir)
+    chunks = pipeline.stage("parse", (split_blobs(chunk, sidecar) for chunk in chunks))
+    record_lists = pipeline.stage("normalize", map(process_dataframe, chunks))
+    return (record for records in record_lists for record in records)
 
-def ensure_columns_exist(supabase):
+def upload_to_supabase(data, batcher=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, sync_state=None,
+                       changed_columns_only=False, journal=None):
     """
-    Ensure all necessary columns exist in the Supabase table
+    Upload data to Supabase in batches packed to a byte budget
     """
-    try:
-        # First, check if we can access the table
-        print("Checking access to product_inventory table...")
-        result = supabase.table("product_inventory").select("product_id").limit(1).execute()
-        
-        if hasattr(result, 'data'):
-            print("Successfully accessed product_inventory table")
-        else:
-            print("Warning: Could not access product_inventory table")
-            return False
-        
-        # We can't directly execute ALTER TABLE commands with the Supabase client
-        # Instead, we'll try to update a record with the new columns and see if it works
-        print("Attempting to ensure all columns exist by updating a test record...")
-        
-        test_record = {
-            "product_id": "test_id",
-            "name": "Test Product",
-            "url": "https://example.com",
-            "price": 99.99,
-            "rating": 4.5,
-            "rating_count": 100,
-            "Menşei": "test_mensei",
-            "RGB": "test_rgb",
-            "Renk": "test_renk"
-        }
-        
-        try:
-            # Try to upsert a test record with all columns
-            result = supabase.table("product_inventory").upsert([test_record]).execute()
-            print("Successfully verified all columns exist in the table")
-            
-            # Delete the test record
-            supabase.table("product_inventory").delete().eq("product_id", "test_id").execute()
-            return True
-        except Exception as e:
-            print(f"Error verifying columns: {str(e)}")
-            print("Will try to upload records anyway")
-            return False
-    
-    except Exception as e:
-        print(f"Exception checking table: {str(e)}")
-        return False
+    return upload_records_to_supabase(data, total_records=len(data), batcher=batcher,
+                                      max_in_flight=max_in_flight, sync_state=sync_state,
+                                      changed_columns_only=changed_columns_only, journal=journal)
 
-def upload_to_supabase(data, batch_size=50):
+def upload_records_to_supabase(records, total_records=None, batcher=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                               sync_state=None, changed_columns_only=False, journal=None, pipeline=None):
     """
-    Upload data to Supabase in batches
+    Upload an iterable of records to Supabase in adaptively sized batches,
+    keeping up to max_in_flight requests outstanding.
+    total_records may be None when records are streamed from the CSV.
+    With a sync_state, only rows that changed since the last synced run are sent.
+    With a journal, rows committed by an interrupted run are skipped and
+    every accepted batch is recorded.
+    With a pipeline, filtering, batching and JSON encoding run on their own
+    "serialize" stage while this thread dispatches requests.
     """
     # Initialize Supabase client
     if not SUPABASE_URL or not SUPABASE_KEY:
         print("Error: Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY environment variables.")
-        return 0, len(data)
+        return 0, total_records or 0
+    
+    # Validate our columns against the cached table schema; no probe records are written
+    upload_columns = VALID_COLUMNS + [col for columns, _ in DERIVED_COLUMNS for col in columns]
+    missing_columns = check_columns(SUPABASE_URL, SUPABASE_KEY, 'product_inventory', upload_columns,
+                                    SCHEMA_CACHE_PATH)
+    if missing_columns:
+        records = drop_columns(records, missing_columns)
+        for columns, ddl in DERIVED_COLUMNS:
+            if set(columns) & set(missing_columns):
+                print(f"To upload {', '.join(columns)}, run in the Supabase SQL editor:{ddl}")
     
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    if batcher is None:
+        batcher = AdaptiveBatcher()
     
-    # Ensure all columns exist
-    ensure_columns_exist(supabase)
+    # Called with every batch the server accepted
+    uploaded_callbacks = []
     
-    total_records = len(data)
-    print(f"Uploading {total_records} records to Supabase in batches of {batch_size}")
+    if journal is not None:
+        # Skip rows an earlier run of the same input file already committed
+        records = journal.skip_committed(records)
+        uploaded_callbacks.append(journal.commit)
+        if journal.committed:
+            total_records = None
     
-    successful_uploads = 0
-    failed_uploads = 0
+    if sync_state is not None:
+        # Diff against the hashes of the last synced snapshot; hashes are only
+        # stored once the server has accepted a row
+        records = sync_state.diff(records, changed_columns_only=changed_columns_only)
+        if changed_columns_only:
+            records = group_by_columns(records)
+        uploaded_callbacks.append(sync_state.mark_synced)
+        total_records = None
+    
+    def on_uploaded(batch):
+        for callback in uploaded_callbacks:
+            callback(batch)
+    
+    budget_message = (f"batches of up to {batcher.target_bytes // 1000} KB / {batcher.max_rows} rows, "
+                      f"{max_in_flight} in flight")
+    if total_records is None:
+        print(f"Streaming records to Supabase in {budget_message}")
+    else:
+        print(f"Uploading {total_records} records to Supabase in {budget_message}")
     
     # Create a log file for the upload process
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file_path = os.path.join(OUTPUT_DIR, f"upload_log_{timestamp}.txt")
     
+    # Rows the server rejects individually are isolated by bisection and kept here
+    quarantine_path = os.path.join(OUTPUT_DIR, f"quarantine_{timestamp}.ndjson")
+    
     with open(log_file_path, 'w', encoding='utf-8') as log_file:
         log_file.write(f"Upload process started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        log_file.write(f"Total records to upload: {total_records}\n\n")
+        if total_records is None:
+            log_file.write("Total records to upload: streaming\n\n")
+        else:
+            log_file.write(f"Total records to upload: {total_records}\n\n")
         
-        # Process in batches to avoid timeouts and memory issues
-        for i in range(0, total_records, batch_size):
-            batch = data[i:i+batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_records + batch_size - 1) // batch_size
-            
-            batch_message = f"Processing batch {batch_num}/{total_batches} ({len(batch)} records)"
-            print(batch_message)
-            log_file.write(f"{batch_message}\n")
-            
-            try:
-                # Clean the batch data to ensure JSON compatibility
-                clean_batch = clean_for_json(batch)
-                
-                # Insert data into the product_inventory table
-                result = supabase.table('product_inventory').upsert(clean_batch).execute()
-                
-                # Check for errors
-                if hasattr(result, 'error') and result.error:
-                    error_message = f"Error in batch {batch_num}: {result.error}"
-                    print(error_message)
-                    log_file.write(f"{error_message}\n")
-                    failed_uploads += len(batch)
-                else:
-                    success_message = f"Successfully uploaded batch {batch_num}"
-                    print(success_message)
-                    log_file.write(f"{success_message}\n")
-                    successful_uploads += len(batch)
-                
-                # Add a small delay to avoid rate limiting
-                time.sleep(1)
-                
-            except Exception as e:
-                error_message = f"Exception in batch {batch_num}: {str(e)}"
-                print(error_message)
-                log_file.write(f"{error_message}\n")
-                failed_uploads += len(batch)
-                time.sleep(2)  # Longer delay after an error
+        # Records are JSON-native when built, so batches are sent without per-batch cleaning
+        with ConcurrentUploader(SUPABASE_URL, SUPABASE_KEY, 'product_inventory', max_in_flight=max_in_flight,
+                                batcher=batcher, log_file=log_file, quarantine_path=quarantine_path,
+                                on_uploaded=on_uploaded) as uploader:
+            batches = uploader.encode_batches(records)
+            if pipeline is not None:
+                batches = pipeline.stage("serialize", batches)
+            successful_uploads, failed_uploads = uploader.upload_batches(batches, total_records=total_records)
+        
+        for tracker in (journal, sync_state):
+            if tracker is not None:
+                print(tracker.summary())
+                log_file.write(f"{tracker.summary()}\n")
         
         summary = f"\nUpload complete: {successful_uploads} successful, {failed_uploads} failed"
         print(summary)
@@ -233,42 +268,216 @@ def upload_to_supabase(data, batch_size=50):
     print(f"Upload log saved to {log_file_path}")
     return successful_uploads, failed_uploads
 
-def save_json_to_file(data, filename):
+def open_backup(filename, compression=None):
     """
-    Save data to a JSON file
+    Open a timestamped NDJSON backup file in the output directory
     """
     # Generate a timestamp for the filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_path = os.path.join(OUTPUT_DIR, f"{filename}_{timestamp}.json")
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        # Use custom JSON encoder to handle NaN values
-        class NpEncoder(json.JSONEncoder):
-            def default(self, obj):
-                if isinstance(obj, np.integer):
-                    return int(obj)
-                if isinstance(obj, np.floating):
-                    return None if np.isnan(obj) else float(obj)
-                if isinstance(obj, np.ndarray):
-                    return obj.tolist()
-                return super(NpEncoder, self).default(obj)
+    return NdjsonBackupWriter(backup_path(OUTPUT_DIR, f"{filename}_{timestamp}", compression))
+
+def save_json_to_file(data, filename, compression=None):
+    """
+    Save records to an NDJSON backup file, one record per line
+    """
+    # Records are JSON-native, so each one is encoded directly without a fallback encoder
+    with open_backup(filename, compression) as backup:
+        for record in data:
+            backup.write(record)
+    
+    print(f"JSON backup saved as {backup.path} ({backup.count} records)")
+    return backup.path
+
+def upload_child_tables(chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                        batch_bytes=DEFAULT_TARGET_BYTES, max_batch_rows=DEFAULT_MAX_ROWS):
+    """
+    Normalize the comments and questions JSON cells into the product_reviews and
+    product_questions tables, upserted in byte-budgeted batches keyed on their natural ids.
+    Each table streams its own blob column from the snapshot (cheap with the Arrow cache).
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("Error: Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY environment variables.")
+        return {}
+    
+    results = {}
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    for child in child_tables():
+        missing_columns = check_columns(SUPABASE_URL, SUPABASE_KEY, child.table, child.columns, SCHEMA_CACHE_PATH)
+        if missing_columns is None or missing_columns:
+            print(f"Skipping {child.table}; create it in the Supabase SQL editor with:{child.ddl}")
+            continue
         
-        json.dump(data, f, ensure_ascii=False, indent=2, cls=NpEncoder)
+        print(f"Loading {child.table} from the {child.column} column...")
+        chunks = read_snapshot(csv_file_path, ['product_id', child.column], chunksize=chunk_size,
+                               cache_dir=snapshot_cache_dir)
+        batcher = AdaptiveBatcher(target_bytes=batch_bytes, max_rows=max_batch_rows, key=child.key)
+        quarantine_path = os.path.join(OUTPUT_DIR, f"quarantine_{child.table}_{timestamp}.ndjson")
+        
+        with ConcurrentUploader(SUPABASE_URL, SUPABASE_KEY, child.table, on_conflict=child.key,
+                                max_in_flight=max_in_flight, batcher=batcher,
+                                quarantine_path=quarantine_path) as uploader:
+            results[child.table] = uploader.upload(child.records(chunks))
+        
+        successful_uploads, failed_uploads = results[child.table]
+        print(f"{child.table}: {successful_uploads} rows upserted, {failed_uploads} failed, "
+              f"{child.duplicates} duplicate rows skipped")
+    
+    return results
+
+def upload_subcategory_summary(sync_state_path, top_n=DEFAULT_TOP_N, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Recompute the per-subcategory aggregates from the snapshot and upsert the
+    subcategories whose aggregates changed since the last synced run.
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("Error: Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY environment variables.")
+        return 0, 0
+    
+    missing_columns = check_columns(SUPABASE_URL, SUPABASE_KEY, SUMMARY_TABLE, SUMMARY_COLUMNS, SCHEMA_CACHE_PATH)
+    if missing_columns is None or missing_columns:
+        print(f"Skipping {SUMMARY_TABLE}; create it in the Supabase SQL editor with:{SUBCATEGORY_SUMMARY_DDL}")
+        return 0, 0
+    
+    # The aggregates need every row, so they are computed from their own projection of the snapshot
+    df = read_snapshot(csv_file_path, SUMMARY_INPUT_COLUMNS, cache_dir=snapshot_cache_dir)
+    df.columns = df.columns.str.strip()
+    records = subcategory_aggregates(df, top_n=top_n)
+    print(f"Computed aggregates for {len(records)} subcategories")
     
-    print(f"JSON file saved as {file_path}")
-    return file_path
+    # Summary rows share the sync state file with the product rows, under their own table name
+    sync_state = SyncState(sync_state_path, table=SUMMARY_TABLE, key='subcategory')
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    quarantine_path = os.path.join(OUTPUT_DIR, f"quarantine_{SUMMARY_TABLE}_{timestamp}.ndjson")
+    batcher = AdaptiveBatcher(key='subcategory')
+    
+    with ConcurrentUploader(SUPABASE_URL, SUPABASE_KEY, SUMMARY_TABLE, on_conflict='subcategory',
+                            max_in_flight=max_in_flight, batcher=batcher, quarantine_path=quarantine_path,
+                            on_uploaded=sync_state.mark_synced) as uploader:
+        successful_uploads, failed_uploads = uploader.upload(sync_state.diff(records))
+    
+    print(f"{SUMMARY_TABLE}: {successful_uploads} subcategories upserted, {failed_uploads} failed, "
+          f"{sync_state.unchanged} unchanged")
+    sync_state.close()
+    return successful_uploads, failed_uploads
+
+def parse_args():
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Upload the product CSV snapshot to Supabase")
+    parser.add_argument("--csv", default=csv_file_path, help="Path to the CSV snapshot")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the CSV in chunks and upload batches as they are parsed")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Number of CSV rows parsed at a time in streaming mode")
+    parser.add_argument("--batch-bytes", type=int, default=DEFAULT_TARGET_BYTES,
+                        help="Initial serialized size budget per upload batch, in bytes")
+    parser.add_argument("--max-batch-rows", type=int, default=DEFAULT_MAX_ROWS,
+                        help="Maximum number of records per upload batch")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Number of upload batches sent concurrently")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only upload rows that are new or changed since the last synced run")
+    parser.add_argument("--changed-columns-only", action="store_true",
+                        help="With --delta, send only the changed columns of changed rows")
+    parser.add_argument("--sync-state", default=os.path.join(OUTPUT_DIR, "sync_state.sqlite"),
+                        help="SQLite file holding the row hashes of the last synced state")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Items buffered between pipeline stages in streaming mode")
+    parser.add_argument("--queue-report", type=float, default=None, metavar="SECONDS",
+                        help="Print pipeline queue depths at this interval in streaming mode")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip rows already committed by an interrupted run on the same CSV file")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse the CSV directly instead of reading the Arrow snapshot cache")
+    parser.add_argument("--sidecar", action="store_true",
+                        help="Also split the comments/questions columns into an indexed side-car file")
+    parser.add_argument("--child-tables", action="store_true",
+                        help="Also load comments/questions into the product_reviews and product_questions tables")
+    parser.add_argument("--helpfulness", action="store_true",
+                        help="Also read the comments column and upload the likes-weighted helpfulness_score")
+    parser.add_argument("--summary", action="store_true",
+                        help="Also refresh the per-subcategory aggregates in the subcategory_summary table")
+    parser.add_argument("--summary-top-n", type=int, default=DEFAULT_TOP_N,
+                        help="Number of best-rated products listed per subcategory in the summary")
+    parser.add_argument("--backup-compression", choices=[c for c in COMPRESSION_SUFFIXES if c], default=None,
+                        help="Compress the NDJSON backup with gzip or zstd")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    csv_file_path = args.csv
+    if args.no_cache:
+        snapshot_cache_dir = None
+    if args.helpfulness:
+        compute_helpfulness = True
+        DERIVED_COLUMNS.append(HELPFULNESS_DERIVED)
+    
+    batcher = AdaptiveBatcher(target_bytes=args.batch_bytes, max_rows=args.max_batch_rows)
+    sync_state = SyncState(args.sync_state) if args.delta else None
+    
+    # Every run journals its committed rows, keyed by the CSV's fingerprint, so it can be resumed
+    # (the snapshot cache already knows the fingerprint of an unchanged CSV, so it is not hashed again)
+    if snapshot_cache_dir is not None:
+        fingerprint = SnapshotCache(snapshot_cache_dir).fingerprint(csv_file_path)
+    else:
+        fingerprint = file_fingerprint(csv_file_path)
+    journal = UploadJournal(os.path.join(OUTPUT_DIR, "journal"), fingerprint, resume=args.resume)
+    
+    upload_options = dict(batcher=batcher, max_in_flight=args.max_in_flight, sync_state=sync_state,
+                          changed_columns_only=args.changed_columns_only, journal=journal)
+    child_table_options = dict(chunk_size=args.chunk_size, max_in_flight=args.max_in_flight,
+                               batch_bytes=args.batch_bytes, max_batch_rows=args.max_batch_rows)
+    
+    # Comments/questions go to a side-car file next to the output, named after the snapshot
+    sidecar = None
+    if args.sidecar:
+        snapshot_name = os.path.splitext(os.path.basename(csv_file_path))[0]
+        sidecar = BlobSidecarWriter(os.path.join(OUTPUT_DIR, "sidecar", f"{snapshot_name}.blobs"))
+    
+    if args.stream:
+        # Stream the CSV through a staged pipeline (parse -> normalize -> serialize -> send);
+        # memory stays bounded by the chunk and queue sizes
+        print("Starting streaming upload to Supabase...")
+        pipeline = StagedPipeline(queue_size=args.queue_size, report_interval=args.queue_report)
+        records = iter_pipelined_records(pipeline, chunk_size=args.chunk_size, sidecar=sidecar)
+        # Every normalized record is written to the backup as it passes, before any delta or resume filtering
+        with open_backup("product_inventory", args.backup_compression) as backup:
+            successful, failed = upload_records_to_supabase(backup.tee(records), pipeline=pipeline,
+                                                            **upload_options)
+        pipeline.stop()
+        print(pipeline.summary())
+        if sidecar is not None:
+            sidecar.close()
+            print(sidecar.summary())
+        
+        print(f"Process completed: {successful} records uploaded successfully, {failed} records failed.")
+        if args.child_tables:
+            upload_child_tables(**child_table_options)
+        if args.summary:
+            upload_subcategory_summary(args.sync_state, top_n=args.summary_top_n, max_in_flight=args.max_in_flight)
+        print(f"JSON backup saved to: {backup.path} ({backup.count} records)")
+        print(f"Check the output directory for logs: {OUTPUT_DIR}")
+        sys.exit(0)
+    
     # Read and process the CSV file
-    json_data = read_and_process_csv()
+    json_data = read_and_process_csv(sidecar=sidecar)
+    if sidecar is not None:
+        sidecar.close()
+        print(sidecar.summary())
     
     # Save the processed data to a JSON file
-    json_file_path = save_json_to_file(json_data, "product_inventory")
+    json_file_path = save_json_to_file(json_data, "product_inventory", args.backup_compression)
     
     # Upload to Supabase
     print("Starting upload to Supabase...")
-    successful, failed = upload_to_supabase(json_data)
+    successful, failed = upload_to_supabase(json_data, **upload_options)
     
     print(f"Process completed: {successful} records uploaded successfully, {failed} records failed.")
+    if args.child_tables:
+        upload_child_tables(**child_table_options)
+    if args.summary:
+        upload_subcategory_summary(args.sync_state, top_n=args.summary_top_n, max_in_flight=args.max_in_flight)
     print(f"JSON backup saved to: {json_file_path}")
-    print(f"Check the output directory for logs: {OUTPUT_DIR}") 
\ No newline at end of file
+    print(f"Check the output directory for logs: {OUTPUT_DIR}")
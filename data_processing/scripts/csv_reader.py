@@ -0,0 +1,59 @@
+import pandas as pd
+
+# Explicit dtypes for every column we know about in the product CSV exports.
+# Numeric columns are read as floats so missing values survive parsing; the
+# upload scripts coerce them to their final types.
+TEXT_COLUMNS = [
+    'product_id', 'name', 'url', 'price',
+    'social_proof_1', 'social_proof_2', 'social_proof_3', 'social_proof_4',
+    'subcategory', 'description', 'extra_description',
+    'comments', 'questions', 'question_tags',
+    'Menşei', 'RGB', 'Renk'
+]
+
+NUMERIC_COLUMNS = [
+    'rating', 'rating_count', 'rating_score', 'total_comment_count', 'average_rating',
+    'total_rating_count', 'total_pages',
+    'star_0_count', 'star_1_count', 'star_2_count', 'star_3_count',
+    'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages'
+]
+
+COLUMN_DTYPES = {col: str for col in TEXT_COLUMNS}
+COLUMN_DTYPES.update({col: 'float64' for col in NUMERIC_COLUMNS})
+
+def read_csv_header(csv_path):
+    """
+    Return a mapping of stripped column names to the raw names in the CSV header
+    """
+    header = pd.read_csv(csv_path, nrows=0)
+    return {str(col).strip(): col for col in header.columns}
+
+def read_projected_csv(csv_path, columns, chunksize=None):
+    """
+    Read only the requested columns from the CSV file.
+
+    Columns that are not requested are skipped by the parser, so large blob
+    columns such as comments and questions are never tokenized or allocated.
+    Returns a DataFrame, or an iterator of DataFrames when chunksize is set.
+    Requested columns missing from the CSV are left out of the result.
+    """
+    header = read_csv_header(csv_path)
+
+    raw_columns = [header[col] for col in columns if col in header]
+    dtypes = {header[col]: COLUMN_DTYPES[col] for col in columns if col in header and col in COLUMN_DTYPES}
+    rename = {raw: raw.strip() for raw in raw_columns}
+
+    if chunksize is None:
+        df = pd.read_csv(csv_path, usecols=raw_columns, dtype=dtypes)
+        return _order_columns(df.rename(columns=rename), columns)
+
+    return _iter_projected_chunks(csv_path, columns, raw_columns, dtypes, rename, chunksize)
+
+def _iter_projected_chunks(csv_path, columns, raw_columns, dtypes, rename, chunksize):
+    with pd.read_csv(csv_path, usecols=raw_columns, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _order_columns(chunk.rename(columns=rename), columns)
+
+def _order_columns(df, columns):
+    # usecols keeps file order; return columns in the order they were requested
+    return df[[col for col in columns if col in df.columns]]
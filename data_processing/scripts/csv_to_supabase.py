@@ -1,10 +1,10 @@
-import pandas as pd
-import json
-from supabase import create_client
 import os
 from dotenv import load_dotenv
-import time
-import numpy as np
+from snapshot_cache import read_snapshot
+from coercion import to_json_records
+from batching import AdaptiveBatcher
+from uploader import ConcurrentUploader, DEFAULT_MAX_IN_FLIGHT
+from backup import NdjsonBackupWriter
 
 # Load environment variables from .env file (if you have one)
 load_dotenv()
@@ -14,20 +14,16 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Initialize Supabase client
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 # Path to the CSV file
 csv_file_path = "/Users/mac/AgesaBot/all_categories_20250207_031918.csv"
 
+# Typed Arrow copies of parsed CSV snapshots, shared with complete_csv_to_supabase.py
+SNAPSHOT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "snapshot_cache")
+
 # Function to read CSV and convert to JSON
 def csv_to_json(csv_file):
     # Read CSV file
     print(f"Reading CSV file: {csv_file}")
-    df = pd.read_csv(csv_file, low_memory=False)
-    
-    # Clean up column names (remove whitespace, etc.)
-    df.columns = df.columns.str.strip()
     
     # Define the columns that exist in the Supabase table and are in our CSV
     # Exclude problematic columns like 'mensei', 'rgb', 'renk', 'average_rating'
@@ -40,9 +36,8 @@ def csv_to_json(csv_file):
         'star_4_count', 'star_5_count', 'total_questions', 'total_qa_pages'
     ]
     
-    # Filter DataFrame to only include valid columns that exist in both CSV and Supabase
-    existing_valid_columns = [col for col in valid_columns if col in df.columns]
-    df = df[existing_valid_columns]
+    # Read only the valid columns that exist in both CSV and Supabase, from the snapshot cache when it is current
+    df = read_snapshot(csv_file, valid_columns, cache_dir=SNAPSHOT_CACHE_DIR)
     
     # Define which columns should be integers (based on your Supabase schema)
     integer_columns = [
@@ -54,86 +49,29 @@ def csv_to_json(csv_file):
     # Define which columns should be floats/numeric
     float_columns = ['rating', 'rating_score']
     
-    # Convert integer columns to integers
-    for col in integer_columns:
-        if col in df.columns:
-            # First convert to float (to handle NaN values), then to int, replacing NaN with None
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            # Convert float values to integers
-            df[col] = df[col].apply(lambda x: int(x) if pd.notnull(x) else None)
-    
-    # Convert float columns to floats
-    for col in float_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Replace NaN values with None (will become null in JSON)
-    df = df.replace({np.nan: None})
-    
-    # Convert DataFrame to list of dictionaries (JSON records)
-    json_data = df.to_dict(orient='records')
-    
-    # Ensure integer values are properly serialized as integers
-    for record in json_data:
-        for col in integer_columns:
-            if col in record and record[col] is not None:
-                record[col] = int(record[col])
+    # Coerce types with nullable Int64/Float64 dtypes and emit JSON-ready records in one pass
+    json_data = to_json_records(df, integer_columns, float_columns)
     
     print(f"Converted {len(json_data)} records to JSON")
     return json_data
 
-# Function to clean data for JSON serialization
-def clean_for_json(data):
-    if isinstance(data, list):
-        return [clean_for_json(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: clean_for_json(value) for key, value in data.items()}
-    elif isinstance(data, float) and np.isnan(data):
-        return None
-    elif isinstance(data, np.float64):
-        return float(data)
-    elif isinstance(data, np.int64):
-        return int(data)
-    else:
-        return data
-
 # Function to upload data to Supabase
-def upload_to_supabase(data, batch_size=100):
+def upload_to_supabase(data, batcher=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
     total_records = len(data)
-    print(f"Uploading {total_records} records to Supabase in batches of {batch_size}")
     
-    successful_uploads = 0
-    failed_uploads = 0
+    # Pack batches to a serialized byte budget that adapts to request latency
+    if batcher is None:
+        batcher = AdaptiveBatcher()
+    print(f"Uploading {total_records} records to Supabase in batches of up to "
+          f"{batcher.target_bytes // 1000} KB / {batcher.max_rows} rows, {max_in_flight} in flight")
     
-    # Process in batches to avoid timeouts and memory issues
-    for i in range(0, total_records, batch_size):
-        batch = data[i:i+batch_size]
-        batch_num = i // batch_size + 1
-        total_batches = (total_records + batch_size - 1) // batch_size
-        
-        print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} records)")
-        
-        try:
-            # Clean the batch data to ensure JSON compatibility
-            clean_batch = clean_for_json(batch)
-            
-            # Insert data into the product_inventory table
-            result = supabase.table('product_inventory').upsert(clean_batch).execute()
-            
-            # Check for errors
-            if hasattr(result, 'error') and result.error:
-                print(f"Error in batch {batch_num}: {result.error}")
-                failed_uploads += len(batch)
-            else:
-                successful_uploads += len(batch)
-                print(f"Successfully uploaded batch {batch_num}")
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"Exception in batch {batch_num}: {str(e)}")
-            failed_uploads += len(batch)
+    # Send several batches concurrently over one keep-alive session
+    # (records are JSON-native when built, so no per-batch cleaning is needed)
+    # Rows the server rejects individually are isolated by bisection and kept in the quarantine file
+    with ConcurrentUploader(SUPABASE_URL, SUPABASE_KEY, 'product_inventory',
+                            max_in_flight=max_in_flight, batcher=batcher,
+                            quarantine_path='product_inventory_quarantine.ndjson') as uploader:
+        successful_uploads, failed_uploads = uploader.upload(data, total_records=total_records)
     
     print(f"Upload complete: {successful_uploads} successful, {failed_uploads} failed")
     return successful_uploads, failed_uploads
@@ -148,22 +86,12 @@ if __name__ == "__main__":
     # Convert CSV to JSON
     json_data = csv_to_json(csv_file_path)
     
-    # Save JSON to file (optional)
-    with open('product_inventory.json', 'w', encoding='utf-8') as f:
-        # Use custom JSON encoder to handle NaN values
-        class NpEncoder(json.JSONEncoder):
-            def default(self, obj):
-                if isinstance(obj, np.integer):
-                    return int(obj)
-                if isinstance(obj, np.floating):
-                    return None if np.isnan(obj) else float(obj)
-                if isinstance(obj, np.ndarray):
-                    return obj.tolist()
-                return super(NpEncoder, self).default(obj)
-        
-        json.dump(json_data, f, ensure_ascii=False, indent=2, cls=NpEncoder)
+    # Save records to an NDJSON backup (optional), one record per line
+    with NdjsonBackupWriter('product_inventory.ndjson') as backup:
+        for record in json_data:
+            backup.write(record)
     
-    print("JSON file saved as product_inventory.json")
+    print(f"JSON backup saved as product_inventory.ndjson ({backup.count} records)")
     
     # Upload to Supabase
     print("Starting upload to Supabase...")
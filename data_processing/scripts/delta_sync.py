@@ -0,0 +1,148 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# Records buffered at a time while grouping partial records by column set
+DEFAULT_GROUP_WINDOW = 1000
+
+def _digest(data, size):
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=size).hexdigest()
+
+def row_hash(record):
+    """
+    Content fingerprint of a JSON-native record, independent of key order
+    """
+    return _digest(json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':')), 16)
+
+def column_hashes(record):
+    """
+    Per-column fingerprints of a record, used to send only changed columns
+    """
+    return {col: _digest(json.dumps(value, ensure_ascii=False, separators=(',', ':')), 8)
+            for col, value in record.items()}
+
+class SyncState:
+    """
+    Local record of the content hash of every row last synced to a Supabase table.
+
+    diff() filters a stream of records down to rows that are new or changed
+    since the last run; mark_synced() stores the hashes of rows once the
+    server has accepted them, so a failed upload is retried on the next run.
+    The two may run on different threads, e.g. in a staged pipeline.
+    """
+
+    def __init__(self, path, table='product_inventory', key='product_id'):
+        self.table = table
+        self.key = key
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " table_name TEXT NOT NULL,"
+            " row_key TEXT NOT NULL,"
+            " row_hash TEXT NOT NULL,"
+            " column_hashes TEXT,"
+            " synced_at TEXT NOT NULL,"
+            " PRIMARY KEY (table_name, row_key))"
+        )
+        self.conn.commit()
+
+        # Only row hashes are kept in memory; column hashes are read on demand
+        self.known = dict(self.conn.execute(
+            "SELECT row_key, row_hash FROM sync_state WHERE table_name = ?", (table,)
+        ))
+        self._pending = {}
+        self.inserted = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    def close(self):
+        self.conn.close()
+
+    def _stored_column_hashes(self, row_key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT column_hashes FROM sync_state WHERE table_name = ? AND row_key = ?", (self.table, row_key)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def diff(self, records, changed_columns_only=False):
+        """
+        Yield the records that are new or changed since the last sync.
+
+        With changed_columns_only, changed rows are reduced to the key plus the
+        columns whose content differs; new rows are always sent in full.
+        """
+        for record in records:
+            row_key = str(record[self.key])
+            digest = row_hash(record)
+            previous = self.known.get(row_key)
+
+            if previous == digest:
+                self.unchanged += 1
+                continue
+
+            hashes = column_hashes(record)
+            self._pending[row_key] = (digest, hashes)
+
+            if previous is None:
+                self.inserted += 1
+                yield record
+                continue
+
+            self.changed += 1
+            stored = self._stored_column_hashes(row_key) if changed_columns_only else None
+            if stored is None:
+                yield record
+            else:
+                yield {col: value for col, value in record.items()
+                       if col == self.key or stored.get(col) != hashes[col]}
+
+    def mark_synced(self, batch):
+        """
+        Persist the hashes of records the server accepted
+        """
+        now = datetime.now().isoformat()
+        rows = []
+        for record in batch:
+            row_key = str(record[self.key])
+            pending = self._pending.pop(row_key, None)
+            if pending is None:
+                continue
+            digest, hashes = pending
+            self.known[row_key] = digest
+            rows.append((self.table, row_key, digest, json.dumps(hashes), now))
+
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (table_name, row_key, row_hash, column_hashes, synced_at)"
+                " VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self.conn.commit()
+
+    def summary(self):
+        return (f"Delta sync: {self.inserted} new, {self.changed} changed, "
+                f"{self.unchanged} unchanged rows skipped")
+
+def group_by_columns(records, window=DEFAULT_GROUP_WINDOW):
+    """
+    Group partial records by their column set within windows of `window` records.
+    PostgREST bulk upserts require every object in a request to have the same keys,
+    and the batcher starts a new batch whenever the column set changes; grouping
+    keeps those batches full. Only one window is buffered, so memory stays flat
+    and the first batch is sent long before the stream ends.
+    """
+    groups = {}
+    buffered = 0
+    for record in records:
+        groups.setdefault(tuple(record), []).append(record)
+        buffered += 1
+        if buffered >= window:
+            for group in groups.values():
+                yield from group
+            groups = {}
+            buffered = 0
+    for group in groups.values():
+        yield from group
@@ -0,0 +1,184 @@
+import argparse
+import itertools
+import os
+import sys
+import uuid
+from datetime import datetime
+
+import httpx
+from dotenv import load_dotenv
+
+from snapshot_cache import read_snapshot
+from coercion import frame_to_records
+from price import add_price_columns
+from backup import NdjsonBackupWriter, backup_path, COMPRESSION_SUFFIXES
+from embeddings import (EmbeddingPipeline, OpenAIEmbeddingBackend, HashEmbeddingBackend, embedding_text,
+                        EMBEDDING_TEXT_COLUMNS, DEFAULT_MODEL, DEFAULT_DIMENSIONS, DEFAULT_REQUEST_TOKENS,
+                        MAX_REQUEST_INPUTS, DEFAULT_MAX_IN_FLIGHT)
+from embedding_cache import EmbeddingCache
+
+# Load environment variables
+load_dotenv()
+
+# Credentials, named as in the frontend .env
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("REACT_APP_OPENAI_API_KEY")
+QDRANT_URL = os.getenv("QDRANT_URL") or os.getenv("REACT_APP_QDRANT_URL")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") or os.getenv("REACT_APP_QDRANT_API_KEY")
+QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION") or os.getenv("REACT_APP_QDRANT_COLLECTION") or "product_inventory"
+
+# Path to the CSV file
+csv_file_path = "/Users/mac/AgesaBot/all_categories_20250207_031918.csv"
+
+# Output directory, shared with complete_csv_to_supabase.py
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
+
+# Typed Arrow copies of parsed CSV snapshots, shared by all scripts (None disables the cache)
+snapshot_cache_dir = os.path.join(OUTPUT_DIR, "snapshot_cache")
+
+# Fields stored with every vector, as in the payloads built by vectorizeSupabaseData.ts
+PAYLOAD_COLUMNS = ['product_id', 'name', 'price', 'price_amount', 'currency', 'subcategory', 'rating', 'url']
+
+# Points sent to Qdrant per upsert request, as in addVectors
+QDRANT_BATCH_SIZE = 100
+
+def point_id(product_id):
+    """
+    Qdrant point id of a product: the numeric product id when it is one,
+    otherwise a UUID derived from it (stable across runs, unlike a random one)
+    """
+    text = str(product_id)
+    if text.isdigit():
+        return int(text)
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"product/{text}"))
+
+def read_products():
+    """
+    Read the embedding text and payload columns of the snapshot into JSON-native records
+    """
+    columns = list(dict.fromkeys(['product_id', 'name', 'price', 'subcategory', 'rating', 'url']
+                                 + EMBEDDING_TEXT_COLUMNS))
+    df = read_snapshot(csv_file_path, columns, cache_dir=snapshot_cache_dir)
+    df.columns = df.columns.str.strip()
+    df = df[df['product_id'].notna()]
+    df = add_price_columns(df)
+    df['product_id'] = df['product_id'].astype('string')
+    return frame_to_records(df)
+
+def upsert_points(points, collection=QDRANT_COLLECTION, batch_size=QDRANT_BATCH_SIZE):
+    """
+    Upsert an iterable of points into an existing Qdrant collection, batch_size
+    points per request as they arrive; returns (successful, failed) point counts
+    """
+    successful = failed = 0
+    headers = {"api-key": QDRANT_API_KEY} if QDRANT_API_KEY else {}
+    points = iter(points)
+    with httpx.Client(base_url=QDRANT_URL.rstrip('/'), headers=headers, timeout=60.0) as client:
+        while True:
+            batch = list(itertools.islice(points, batch_size))
+            if not batch:
+                break
+            start = successful + failed
+            response = client.put(f"/collections/{collection}/points", params={"wait": "true"},
+                                  json={"points": batch})
+            if response.status_code == 404:
+                print(f"Collection {collection} not found; create it first with src/scripts/create-collection.ts")
+                # The remaining points are still consumed, so every one reaches the points file
+                failed += len(batch) + sum(1 for _ in points)
+                break
+            if response.is_success:
+                successful += len(batch)
+            else:
+                print(f"Error upserting points {start}-{start + len(batch) - 1}: "
+                      f"HTTP {response.status_code} {response.text[:200]}")
+                failed += len(batch)
+    print(f"Qdrant: {successful} points upserted into {collection}, {failed} failed")
+    return successful, failed
+
+def embed_products(pipeline, compression=None, upload=False):
+    """
+    Embed every product of the snapshot and write the resulting Qdrant points
+    ({id, vector, payload}) to an NDJSON file. With upload, the points are also
+    upserted into the Qdrant collection as they are embedded, so only one
+    upsert batch is held in memory. Returns the file path.
+    """
+    products = read_products()
+    payloads = {record['product_id']: {col: record.get(col) for col in PAYLOAD_COLUMNS} for record in products}
+    print(f"Embedding {len(products)} products with {pipeline.backend.model} in requests of up to "
+          f"{pipeline.max_request_tokens} tokens / {pipeline.max_inputs} texts, {pipeline.max_in_flight} in flight")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    items = ((record['product_id'], embedding_text(record)) for record in products)
+    with NdjsonBackupWriter(backup_path(OUTPUT_DIR, f"embeddings_{timestamp}", compression)) as output:
+        points = output.tee({"id": point_id(product_id), "vector": vector, "payload": payloads[product_id]}
+                            for product_id, _, vector in pipeline.embed(items))
+        if upload:
+            upsert_points(points)
+        else:
+            for _ in points:
+                pass
+
+    print(pipeline.summary())
+    if pipeline.cache is not None:
+        print(pipeline.cache.summary())
+    print(f"Points saved as {output.path} ({output.count} points)")
+    return output.path
+
+def parse_args():
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Embed the product CSV snapshot for the Qdrant collection")
+    parser.add_argument("--csv", default=csv_file_path, help="Path to the CSV snapshot")
+    parser.add_argument("--backend", choices=["openai", "hash"], default="openai",
+                        help="Embedding backend; 'hash' is a local stand-in that needs no API key")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Embedding model")
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS, help="Embedding dimensions")
+    parser.add_argument("--max-request-tokens", type=int, default=DEFAULT_REQUEST_TOKENS,
+                        help="Estimated tokens packed into one embedding request")
+    parser.add_argument("--max-request-inputs", type=int, default=MAX_REQUEST_INPUTS,
+                        help="Texts packed into one embedding request")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Embedding requests sent concurrently")
+    parser.add_argument("--embedding-cache", default=os.path.join(OUTPUT_DIR, "embedding_cache.sqlite"),
+                        help="SQLite file caching vectors by model, dimensions and text hash")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="Embed every product, without reading or filling the embedding cache")
+    parser.add_argument("--upload", action="store_true",
+                        help="Upsert the points into the Qdrant collection (QDRANT_URL, QDRANT_COLLECTION)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse the CSV directly instead of reading the Arrow snapshot cache")
+    parser.add_argument("--output-compression", choices=[c for c in COMPRESSION_SUFFIXES if c], default=None,
+                        help="Compress the NDJSON points file with gzip or zstd")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    csv_file_path = args.csv
+    if args.no_cache:
+        snapshot_cache_dir = None
+    if args.upload and not QDRANT_URL:
+        print("Error: Qdrant URL not found. Please set QDRANT_URL (or REACT_APP_QDRANT_URL).")
+        sys.exit(1)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    if args.backend == "hash":
+        backend = HashEmbeddingBackend(dimensions=args.dimensions)
+    else:
+        if not OPENAI_API_KEY:
+            print("Error: OpenAI API key not found. Please set OPENAI_API_KEY (or REACT_APP_OPENAI_API_KEY).")
+            sys.exit(1)
+        backend = OpenAIEmbeddingBackend(OPENAI_API_KEY, model=args.model, dimensions=args.dimensions,
+                                         max_connections=args.max_in_flight)
+
+    # Only texts whose vector is not cached for this model and size are sent to the backend
+    cache = None if args.no_embedding_cache else EmbeddingCache(args.embedding_cache, backend.model, backend.dimensions)
+    pipeline = EmbeddingPipeline(backend, max_request_tokens=args.max_request_tokens,
+                                 max_inputs=args.max_request_inputs, max_in_flight=args.max_in_flight, cache=cache)
+    try:
+        embed_products(pipeline, args.output_compression, upload=args.upload)
+    finally:
+        backend.close()
+        if cache is not None:
+            cache.close()
+
+    print(f"Check the output directory for logs: {OUTPUT_DIR}")
@@ -0,0 +1,114 @@
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+
+def normalize_text(text):
+    """
+    Canonical form of an embedding text for cache lookups: Unicode NFC with
+    whitespace runs collapsed and the ends stripped. Case is kept, since
+    embedding models are case sensitive.
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+def text_hash(text):
+    """
+    sha256 of the normalized text
+    """
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """
+    On-disk cache of embedding vectors, keyed by (model, dimensions, sha256 of
+    the normalized text).
+
+    Vectors are stored as float32 blobs in SQLite, so an unchanged product
+    description is never sent to the embedding backend again, whichever run
+    or snapshot it comes from. Lookups and stores are counted for the run
+    summary.
+    """
+
+    def __init__(self, path, model, dimensions):
+        self.model = model
+        self.dimensions = dimensions
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            " model TEXT NOT NULL,"
+            " dimensions INTEGER NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " created_at TEXT NOT NULL,"
+            " PRIMARY KEY (model, dimensions, text_hash))"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, hashes):
+        """
+        Return {text_hash: vector} for the hashes that are cached
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay under SQLite's limit on bound parameters per statement
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            rows = self.conn.execute(
+                "SELECT text_hash, vector FROM embedding_cache WHERE model = ? AND dimensions = ?"
+                f" AND text_hash IN ({','.join('?' * len(part))})", [self.model, self.dimensions] + part
+            )
+            found.update((digest, np.frombuffer(blob, dtype='<f4').tolist()) for digest, blob in rows)
+        return found
+
+    def put_many(self, entries):
+        """
+        Store (text_hash, vector) pairs
+        """
+        now = datetime.now().isoformat()
+        rows = [(self.model, self.dimensions, digest, np.asarray(vector, dtype='<f4').tobytes(), now)
+                for digest, vector in entries]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (model, dimensions, text_hash, vector, created_at)"
+            " VALUES (?, ?, ?, ?, ?)", rows
+        )
+        self.conn.commit()
+        self.stored += len(rows)
+
+    def split(self, items, chunk_size=1000):
+        """
+        Look up (key, text) items in chunks and yield (key, text, text_hash, vector),
+        where vector is None for texts that are not cached
+        """
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield from self._split_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._split_chunk(chunk)
+
+    def _split_chunk(self, chunk):
+        hashes = [text_hash(text) for _, text in chunk]
+        found = self.get_many(hashes)
+        for (key, text), digest in zip(chunk, hashes):
+            vector = found.get(digest)
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            yield key, text, digest, vector
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return (f"Embedding cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+                f"{self.stored} vectors stored")
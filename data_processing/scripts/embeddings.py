@@ -0,0 +1,285 @@
+import hashlib
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import httpx
+import numpy as np
+
+from ratelimit import AimdRateLimiter, parse_retry_after
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact token counts instead of the byte-length estimate
+    tiktoken = None
+
+# Embedding model used by the TypeScript services (src/services/embeddings.ts)
+DEFAULT_MODEL = 'text-embedding-3-small'
+DEFAULT_DIMENSIONS = 1536
+
+OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+
+# Product fields combined into the embedding text, in the order prepareTextForEmbedding uses
+EMBEDDING_TEXT_COLUMNS = ['name', 'description', 'extra_description', 'subcategory']
+
+# OpenAI limits: tokens per input, tokens summed over one request, inputs per request
+MAX_INPUT_TOKENS = 8191
+MAX_REQUEST_TOKENS = 300_000
+MAX_REQUEST_INPUTS = 2048
+
+# Requests are packed below the hard limit so an underestimated token count cannot push one over
+DEFAULT_REQUEST_TOKENS = 100_000
+
+# Embedding requests sent concurrently
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# New vectors written to the embedding cache per transaction
+CACHE_WRITE_SIZE = 500
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 60.0
+
+# Without tiktoken, tokens are estimated from the UTF-8 length. Turkish text
+# averages well over 3 bytes per token, so this overestimates and stays safe.
+BYTES_PER_TOKEN = 3
+
+def embedding_text(product):
+    """
+    Text embedded for a product: the same fields and joining as
+    prepareTextForEmbedding in vectorizeSupabaseData.ts (falsy parts dropped,
+    the rest joined with spaces)
+    """
+    parts = [product.get(col) for col in EMBEDDING_TEXT_COLUMNS]
+    # NaN is what pandas reads empty cells as; like null in the TS version it is skipped
+    return ' '.join(str(part) for part in parts if part and not (isinstance(part, float) and math.isnan(part)))
+
+class TokenCounter:
+    """
+    Count (or estimate) the tokens of a text for a model, and cut texts to a token budget
+    """
+
+    def __init__(self, model=DEFAULT_MODEL):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding('cl100k_base')
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return -(-len(text.encode('utf-8')) // BYTES_PER_TOKEN)
+
+    def truncate(self, text, max_tokens):
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            return self.encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+        data = text.encode('utf-8')
+        limit = max_tokens * BYTES_PER_TOKEN
+        return data[:limit].decode('utf-8', errors='ignore') if len(data) > limit else text
+
+class BackendThrottled(Exception):
+    """
+    The embedding backend asked for a slower request rate (429) or failed transiently (5xx)
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class OpenAIEmbeddingBackend:
+    """
+    Embeddings from the OpenAI HTTP API, one request per batch of texts
+    """
+
+    def __init__(self, api_key, model=DEFAULT_MODEL, dimensions=DEFAULT_DIMENSIONS, url=OPENAI_EMBEDDINGS_URL,
+                 timeout=DEFAULT_TIMEOUT, max_connections=DEFAULT_MAX_IN_FLIGHT):
+        self.model = model
+        self.dimensions = dimensions
+        self.url = url
+        self.client = httpx.Client(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def close(self):
+        self.client.close()
+
+    def embed(self, texts):
+        body = {"model": self.model, "input": texts, "encoding_format": "float"}
+        if self.dimensions is not None:
+            body["dimensions"] = self.dimensions
+        response = self.client.post(self.url, json=body)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise BackendThrottled(f"HTTP {response.status_code} {response.text[:200]}",
+                                   parse_retry_after(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+class HashEmbeddingBackend:
+    """
+    Local stand-in backend for tests and dry runs: hashed bag-of-words vectors,
+    L2-normalized, so identical texts get identical vectors and texts sharing
+    words are similar. No network access; latency simulates a remote call.
+    """
+
+    def __init__(self, dimensions=DEFAULT_DIMENSIONS, model='local-hash', latency=0.0):
+        self.model = model
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def close(self):
+        pass
+
+    def _vector(self, text):
+        vector = np.zeros(self.dimensions, dtype='float64')
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).round(6).tolist()
+
+    def embed(self, texts):
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+class EmbeddingPipeline:
+    """
+    Embed a stream of texts with concurrent, token-budgeted requests.
+
+    Texts are packed greedily into requests of at most max_request_tokens
+    (estimated) tokens and max_inputs texts; a text longer than the model's
+    per-input limit is truncated first. Up to max_in_flight requests run at
+    once, paced by an AIMD rate limiter; throttled or failed requests are
+    retried with backoff, and a request that still fails is reported and its
+    texts are skipped.
+
+    With an EmbeddingCache, only texts missing from the cache are sent (each
+    distinct text once per run), and every new vector is stored.
+    """
+
+    def __init__(self, backend, max_request_tokens=DEFAULT_REQUEST_TOKENS, max_inputs=MAX_REQUEST_INPUTS,
+                 max_input_tokens=MAX_INPUT_TOKENS, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate_limiter=None,
+                 max_retries=DEFAULT_MAX_RETRIES, cache=None):
+        self.backend = backend
+        self.cache = cache
+        self.max_request_tokens = min(max_request_tokens, MAX_REQUEST_TOKENS)
+        self.max_inputs = min(max_inputs, MAX_REQUEST_INPUTS)
+        self.max_input_tokens = max_input_tokens
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = rate_limiter or AimdRateLimiter()
+        self.max_retries = max_retries
+        self.tokens = TokenCounter(backend.model)
+        self.requests = 0
+        self.embedded = 0
+        self.failed = 0
+        self.truncated = 0
+        self.estimated_tokens = 0
+
+    def pack(self, items):
+        """
+        Group (key, text) items into requests: lists of (key, text, tokens)
+        """
+        request, request_tokens = [], 0
+        for key, text in items:
+            tokens = self.tokens.count(text)
+            if tokens > self.max_input_tokens:
+                text = self.tokens.truncate(text, self.max_input_tokens)
+                tokens = self.tokens.count(text)
+                self.truncated += 1
+            if request and (request_tokens + tokens > self.max_request_tokens or len(request) >= self.max_inputs):
+                yield request
+                request, request_tokens = [], 0
+            request.append((key, text, tokens))
+            request_tokens += tokens
+        if request:
+            yield request
+
+    def _send(self, request):
+        """
+        Embed one packed request, retrying throttled or failed calls; runs on a worker thread
+        """
+        texts = [text for _, text, _ in request]
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                vectors = self.backend.embed(texts)
+            except (BackendThrottled, httpx.TransportError) as e:
+                self.rate_limiter.on_throttle(getattr(e, 'retry_after', None))
+                if attempt == self.max_retries:
+                    raise
+                print(f"Embedding request of {len(texts)} texts failed: {str(e)} (retrying)")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            self.rate_limiter.on_success()
+            if len(vectors) != len(texts):
+                raise ValueError(f"backend returned {len(vectors)} vectors for {len(texts)} texts")
+            return vectors
+
+    def embed(self, items):
+        """
+        Embed an iterable of (key, text) items and yield (key, text, vector)
+        as requests complete (not necessarily in input order). Cached texts
+        are yielded first, without a request.
+        """
+        if self.cache is None:
+            yield from self._embed(items)
+            return
+
+        # Texts missing from the cache, grouped by hash so repeated texts are embedded once
+        misses = {}
+        for key, text, digest, vector in self.cache.split(items):
+            if vector is not None:
+                yield key, text, vector
+            else:
+                misses.setdefault(digest, []).append((key, text))
+
+        new_vectors = []
+        for digest, _, vector in self._embed((digest, group[0][1]) for digest, group in misses.items()):
+            new_vectors.append((digest, vector))
+            if len(new_vectors) >= CACHE_WRITE_SIZE:
+                self.cache.put_many(new_vectors)
+                new_vectors = []
+            for key, text in misses[digest]:
+                yield key, text, vector
+        if new_vectors:
+            self.cache.put_many(new_vectors)
+
+    def _embed(self, items):
+        pending = {}
+
+        def drain():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                request = pending.pop(future)
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    print(f"Error embedding {len(request)} texts "
+                          f"[{request[0][0]}..{request[-1][0]}]: {str(e)}")
+                    self.failed += len(request)
+                    continue
+                self.embedded += len(request)
+                yield from ((key, text, vector) for (key, text, _), vector in zip(request, vectors))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for request in self.pack(items):
+                self.requests += 1
+                self.estimated_tokens += sum(tokens for _, _, tokens in request)
+                pending[executor.submit(self._send, request)] = request
+                # Keep at most max_in_flight requests outstanding
+                while len(pending) >= self.max_in_flight:
+                    yield from drain()
+            while pending:
+                yield from drain()
+
+    def summary(self):
+        counting = "counted" if self.tokens.encoding is not None else "estimated"
+        return (f"Embeddings: {self.embedded} texts in {self.requests} requests "
+                f"(~{self.estimated_tokens} {counting} tokens, {self.truncated} truncated), "
+                f"{self.failed} failed, model {self.backend.model} ({self.backend.dimensions} dimensions)")
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+def file_fingerprint(path, block_size=1 << 20):
+    """
+    Identify the content of an input file: its size plus a SHA-256 of its bytes
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return f"{os.path.getsize(path)}-{digest.hexdigest()}"
+
+class UploadJournal:
+    """
+    Append-only, fsync'd journal of the row keys the server has accepted for one input file.
+
+    The journal file name is derived from the input file's fingerprint, so a
+    rerun with --resume on the same snapshot skips every row already committed,
+    while a different snapshot always starts a fresh journal. Each accepted
+    batch is one JSON line; a line cut short by a crash is ignored on resume.
+    """
+
+    def __init__(self, journal_dir, fingerprint, table='product_inventory', key='product_id', resume=False):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.key = key
+        self.path = os.path.join(journal_dir, f"{table}_{fingerprint.replace('-', '_')[:40]}.journal")
+        self.committed = self._load() if resume else set()
+        self.skipped = 0
+
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._ends_mid_line():
+            # Terminate the partial line so the next entry starts on its own line
+            self.file.write("\n")
+        if not resume or not self.committed:
+            self._append({"fingerprint": fingerprint, "table": table, "started_at": datetime.now().isoformat()})
+
+    def _load(self):
+        committed = set()
+        if not os.path.exists(self.path):
+            return committed
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Partial line from an interrupted write
+                    continue
+                committed.update(entry.get("keys", ()))
+        return committed
+
+    def _ends_mid_line(self):
+        if not os.path.getsize(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def _append(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def skip_committed(self, records):
+        """
+        Yield only records whose key has not been committed yet
+        """
+        for record in records:
+            if str(record[self.key]) in self.committed:
+                self.skipped += 1
+                continue
+            yield record
+
+    def commit(self, batch):
+        """
+        Durably record the keys (and encoded size) of a Batch the server accepted
+        """
+        keys = [str(record[self.key]) for record in batch]
+        self._append({"keys": keys, "bytes": batch.size})
+        self.committed.update(keys)
+
+    def summary(self):
+        return f"Resume journal: {self.skipped} already committed rows skipped ({self.path})"
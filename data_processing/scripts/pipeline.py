@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+
+# Items buffered between two stages
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+class _StageError:
+    def __init__(self, error):
+        self.error = error
+
+class StagedPipeline:
+    """
+    Run the stages of an ingestion job concurrently, connected by bounded queues.
+
+    stage(name, iterable) starts a thread that pulls items from `iterable` and
+    puts them on a bounded queue, and returns an iterator over that queue.
+    Because generators are lazy, any work chained onto the iterable (parsing,
+    normalizing, encoding) runs on that stage's thread. A full queue blocks its
+    producer, so memory stays bounded and the total run time approaches the
+    time of the slowest stage rather than the sum of all of them.
+
+    Queue depths are sampled while the pipeline runs: a queue that is mostly
+    full means the stage consuming it is the bottleneck.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, report_interval=None, sample_interval=0.05):
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.sample_interval = sample_interval
+        self.queues = {}
+        self.samples = {}
+        self._stopped = threading.Event()
+        self._monitor = None
+
+    def stage(self, name, iterable):
+        """
+        Produce the items of `iterable` on a new thread and return an iterator over them
+        """
+        stage_queue = queue.Queue(maxsize=self.queue_size)
+        self.queues[name] = stage_queue
+        self.samples[name] = []
+
+        def produce():
+            try:
+                for item in iterable:
+                    stage_queue.put(item)
+            except BaseException as e:
+                stage_queue.put(_StageError(e))
+                return
+            stage_queue.put(_DONE)
+
+        threading.Thread(target=produce, name=f"pipeline-{name}", daemon=True).start()
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._watch, name="pipeline-monitor", daemon=True)
+            self._monitor.start()
+        return self._consume(stage_queue)
+
+    def _consume(self, stage_queue):
+        while True:
+            item = stage_queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+
+    def depths(self):
+        """
+        Current number of items waiting in each stage's output queue
+        """
+        return {name: stage_queue.qsize() for name, stage_queue in list(self.queues.items())}
+
+    def _watch(self):
+        last_report = time.monotonic()
+        while not self._stopped.wait(self.sample_interval):
+            for name, depth in self.depths().items():
+                self.samples[name].append(depth)
+            if self.report_interval and time.monotonic() - last_report >= self.report_interval:
+                last_report = time.monotonic()
+                print("Queue depth: " + ", ".join(f"{name} {depth}/{self.queue_size}"
+                                                  for name, depth in self.depths().items()))
+
+    def stop(self):
+        self._stopped.set()
+
+    def summary(self):
+        """
+        Average and maximum sampled depth of every stage's output queue
+        """
+        parts = []
+        for name, samples in list(self.samples.items()):
+            if samples:
+                parts.append(f"{name} avg {sum(samples) / len(samples):.1f} / max {max(samples)}")
+            else:
+                parts.append(f"{name} (no samples)")
+        return f"Stage output queues (capacity {self.queue_size}): " + ", ".join(parts)
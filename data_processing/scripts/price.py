@@ -0,0 +1,52 @@
+import pandas as pd
+
+# Columns derived from the display price
+PRICE_COLUMNS = ['price_amount', 'currency']
+
+# Run once in the Supabase SQL editor so the derived columns are uploaded and can be range-filtered
+PRICE_COLUMNS_DDL = """
+ALTER TABLE product_inventory ADD COLUMN IF NOT EXISTS price_amount BIGINT;
+ALTER TABLE product_inventory ADD COLUMN IF NOT EXISTS currency TEXT;
+CREATE INDEX IF NOT EXISTS product_inventory_price_amount_idx ON product_inventory (price_amount);
+"""
+
+# Currency markers found in display prices, mapped to ISO 4217 codes
+CURRENCY_PATTERN = r'(?P<currency>TL|TRY|₺)'
+CURRENCY_CODES = {'TL': 'TRY', 'TRY': 'TRY', '₺': 'TRY'}
+
+# A Turkish-formatted amount: dots group thousands, a comma starts the (up to two) decimals
+AMOUNT_PATTERN = r'(?P<whole>\d{1,3}(?:\.\d{3})+|\d+)(?:,(?P<fraction>\d{1,2}))?'
+
+# The whole display price: the amount with an optional currency marker before or after it.
+# Anchored, so a format the amount pattern does not cover ("1079.98 TL") gives <NA>
+# instead of a silently truncated number.
+PRICE_PATTERN = rf'^(?:{CURRENCY_PATTERN}\s*)?{AMOUNT_PATTERN}(?:\s*(?P<suffix>TL|TRY|₺))?$'
+
+def parse_prices(prices):
+    """
+    Parse display prices such as "1.079,98 TL" or "₺175" in a vectorized way.
+
+    Returns a DataFrame with price_amount (integer kuruş, Int64) and currency
+    (ISO code), aligned with the input. Prices that cannot be parsed get <NA>
+    in both columns; an amount without a currency marker is taken as TRY.
+    """
+    text = prices.astype('string').str.strip()
+
+    amounts = text.str.extract(PRICE_PATTERN)
+    whole = pd.to_numeric(amounts['whole'].str.replace('.', '', regex=False), errors='coerce').astype('Int64')
+    # "9,9" means 9.90: pad the fraction to two digits before reading it as kuruş
+    fraction = pd.to_numeric(amounts['fraction'].str.ljust(2, '0'), errors='coerce').astype('Int64').fillna(0)
+    price_amount = whole * 100 + fraction
+
+    currency = amounts['currency'].fillna(amounts['suffix']).map(CURRENCY_CODES).astype('string')
+    currency = currency.fillna('TRY').where(price_amount.notna())
+
+    return pd.DataFrame({'price_amount': price_amount, 'currency': currency}, index=prices.index)
+
+def add_price_columns(df, column='price'):
+    """
+    Return a copy of the frame with price_amount and currency parsed from its price column
+    """
+    if column not in df.columns:
+        return df
+    return pd.concat([df, parse_prices(df[column])], axis=1)
@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Requests per second at start-up and the bounds the rate may move between
+DEFAULT_INITIAL_RATE = 10.0
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 500.0
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta seconds or HTTP date) into seconds, or None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class AimdRateLimiter:
+    """
+    Token bucket whose refill rate follows additive-increase/multiplicative-decrease.
+
+    Every successful request raises the rate by `increase` requests per second;
+    a throttled (429) or failed (5xx) request multiplies it by `decrease`, and a
+    Retry-After hint pauses all senders until it has elapsed. The rate therefore
+    settles just under the highest throughput the backend accepts.
+    Safe to share between threads.
+    """
+
+    def __init__(self, rate=DEFAULT_INITIAL_RATE, min_rate=DEFAULT_MIN_RATE, max_rate=DEFAULT_MAX_RATE,
+                 increase=1.0, decrease=0.5, burst=None):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.rate = min(max_rate, max(min_rate, rate))
+        self.burst = burst
+        self.tokens = self._capacity()
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = float('-inf')
+        self.lock = threading.Lock()
+
+    def _capacity(self):
+        # Allow roughly one second worth of requests to be sent back to back
+        return self.burst if self.burst is not None else max(1.0, self.rate)
+
+    def _refill(self, now):
+        self.tokens = min(self._capacity(), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Block until a request may be sent
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def on_success(self):
+        """
+        Additive increase after a request the backend accepted
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """
+        Multiplicative decrease after a 429/5xx response, honouring Retry-After
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Requests already in flight report the same congestion; back off once per second
+            if now - self.last_decrease >= 1.0:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.tokens = min(self.tokens, self._capacity())
+                self.last_decrease = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
@@ -0,0 +1,116 @@
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+
+STAR_COLUMNS = ['star_1_count', 'star_2_count', 'star_3_count', 'star_4_count', 'star_5_count']
+
+# Ranking features derived from the star histogram
+RATING_COLUMNS = ['bayesian_rating', 'wilson_lower_bound', 'rating_variance']
+
+# Derived from the review likes in the comments column, so only computed on request
+HELPFULNESS_COLUMNS = ['helpfulness_score']
+
+def _columns_ddl(columns):
+    return "\n" + "".join(f"ALTER TABLE product_inventory ADD COLUMN IF NOT EXISTS {col} DOUBLE PRECISION;\n"
+                          for col in columns)
+
+# Run once in the Supabase SQL editor so the features are uploaded and can be sorted on
+RATING_COLUMNS_DDL = _columns_ddl(RATING_COLUMNS) + (
+    "CREATE INDEX IF NOT EXISTS product_inventory_bayesian_rating_idx ON product_inventory (bayesian_rating);\n")
+HELPFULNESS_COLUMNS_DDL = _columns_ddl(HELPFULNESS_COLUMNS)
+
+# Bayesian smoothing prior: a product with few ratings is pulled towards PRIOR_MEAN
+# as if it had PRIOR_WEIGHT extra ratings of that value. Fixed (rather than taken
+# from the data) so a product's score does not depend on which chunk it was parsed in.
+DEFAULT_PRIOR_MEAN = 4.0
+DEFAULT_PRIOR_WEIGHT = 10
+
+# z for the 95% Wilson interval of the share of positive (4-5 star) ratings
+DEFAULT_WILSON_Z = 1.96
+
+def _parse_reviews(comments):
+    """
+    Parse a column of comments cells into one list of review dicts per cell.
+    The whole column is decoded with a single json.loads; cells are only
+    parsed one by one when some cell is not valid JSON.
+    """
+    cells = comments.astype('string').fillna('[]').to_numpy(dtype=object)
+    try:
+        parsed = json.loads('[' + ','.join(cells) + ']')
+    except ValueError:
+        parsed = []
+        for cell in cells:
+            try:
+                parsed.append(json.loads(cell))
+            except ValueError:
+                parsed.append([])
+    return [[review for review in reviews if isinstance(review, dict)] if isinstance(reviews, list) else []
+            for reviews in parsed]
+
+def helpfulness_scores(comments):
+    """
+    Mean review rating of every product with each review weighted by 1 + its likes.
+
+    Reviews are flattened into NumPy arrays and summed per product with
+    bincount. Returns a Float64 Series aligned with comments, rounded like the
+    other features; products without rated reviews get <NA>.
+    """
+    reviews = _parse_reviews(comments)
+    lengths = np.fromiter(map(len, reviews), dtype='int64', count=len(reviews))
+    flat = list(itertools.chain.from_iterable(reviews))
+    owner = np.repeat(np.arange(len(reviews)), lengths)
+
+    rate = pd.to_numeric(pd.Series([review.get('rate') for review in flat], dtype=object),
+                         errors='coerce').to_numpy(dtype='float64')
+    likes = pd.to_numeric(pd.Series([review.get('likes') for review in flat], dtype=object),
+                          errors='coerce').to_numpy(dtype='float64')
+    weight = 1.0 + np.where(likes > 0, likes, 0.0)
+    rated = ~np.isnan(rate)
+
+    total = np.bincount(owner[rated], weights=(rate * weight)[rated], minlength=len(reviews))
+    weights = np.bincount(owner[rated], weights=weight[rated], minlength=len(reviews))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(weights > 0, total / weights, np.nan)
+    return pd.Series(pd.array(np.round(score, 4), dtype='Float64'), index=comments.index, name='helpfulness_score')
+
+def rating_features(df, prior_mean=DEFAULT_PRIOR_MEAN, prior_weight=DEFAULT_PRIOR_WEIGHT, z=DEFAULT_WILSON_Z):
+    """
+    Compute ranking features from the star histogram columns with NumPy.
+
+    - bayesian_rating: mean star rating smoothed towards the prior
+    - wilson_lower_bound: lower bound of the Wilson score interval for the
+      share of 4-5 star ratings
+    - rating_variance: variance of the star ratings
+
+    Returns a DataFrame of Float64 columns aligned with df; products without
+    ratings get <NA>.
+    """
+    counts = np.column_stack([
+        pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=0.0)
+        if col in df.columns else np.zeros(len(df))
+        for col in STAR_COLUMNS
+    ])
+    stars = np.arange(1, 6, dtype='float64')
+    n = counts.sum(axis=1)
+    rated = n > 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = counts @ stars / n
+        variance = counts @ (stars ** 2) / n - mean ** 2
+        bayesian = (prior_weight * prior_mean + counts @ stars) / (prior_weight + n)
+
+        positive = (counts[:, 3] + counts[:, 4]) / n
+        z2 = z * z
+        wilson = (positive + z2 / (2 * n)
+                  - z * np.sqrt(positive * (1 - positive) / n + z2 / (4 * n * n))) / (1 + z2 / n)
+
+    features = {
+        'bayesian_rating': np.where(rated, bayesian, np.nan),
+        'wilson_lower_bound': np.where(rated, wilson, np.nan),
+        'rating_variance': np.where(rated, np.maximum(variance, 0.0), np.nan),
+    }
+    # Rounded so row hashes (delta sync) do not change with floating point noise
+    return pd.DataFrame({col: pd.array(np.round(values, 4), dtype='Float64')
+                         for col, values in features.items()}, index=df.index)
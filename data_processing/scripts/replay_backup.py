@@ -0,0 +1,139 @@
+import argparse
+import itertools
+import os
+import sys
+from datetime import datetime
+from dotenv import load_dotenv
+from batching import AdaptiveBatcher, DEFAULT_TARGET_BYTES, DEFAULT_MAX_ROWS
+from uploader import ConcurrentUploader, DEFAULT_MAX_IN_FLIGHT
+from journal import UploadJournal, file_fingerprint
+from schema import check_columns, drop_columns
+from backup import iter_backup_records
+
+# Load environment variables
+load_dotenv()
+
+# Supabase credentials
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Output directory, shared with complete_csv_to_supabase.py
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
+
+# Cached PostgREST schema description, shared with the other upload scripts
+SCHEMA_CACHE_PATH = os.path.join(OUTPUT_DIR, "schema_cache.json")
+
+# Primary key of each table the upload scripts write; journals and batch labels use it as the row key
+TABLE_KEYS = {'product_inventory': 'product_id', 'product_reviews': 'review_key',
+              'product_questions': 'question_id', 'subcategory_summary': 'subcategory'}
+
+def row_key(table, on_conflict=None):
+    """
+    Column identifying a row of the table: the upsert conflict column when a
+    single one is given, otherwise the table's primary key
+    """
+    if on_conflict and ',' not in on_conflict:
+        return on_conflict.strip()
+    return TABLE_KEYS.get(table, 'product_id')
+
+def replay_backup(backup_file, table='product_inventory', on_conflict=None, batcher=None,
+                  max_in_flight=DEFAULT_MAX_IN_FLIGHT, journal=None, key=None):
+    """
+    Upload the records of a JSON/NDJSON backup to Supabase.
+
+    Every record in a backup is already normalized, so records go straight
+    from the file to the uploader: no CSV parsing, no pandas, and only the
+    batches in flight are held in memory. key is the row key column that
+    labels batches (see row_key); a journal must use the same one.
+    """
+    if key is None:
+        key = row_key(table, on_conflict)
+    records = iter_backup_records(backup_file)
+
+    # Validate the backup's columns against the cached table schema, using its first record
+    first = next(records, None)
+    if first is None:
+        print(f"Backup {backup_file} contains no records")
+        return 0, 0
+    records = itertools.chain([first], records)
+    missing_columns = check_columns(SUPABASE_URL, SUPABASE_KEY, table, list(first), SCHEMA_CACHE_PATH)
+    if missing_columns:
+        records = drop_columns(records, missing_columns)
+
+    if journal is not None:
+        # Skip rows an interrupted replay of the same backup already committed
+        records = journal.skip_committed(records)
+
+    if batcher is None:
+        batcher = AdaptiveBatcher(key=key)
+    print(f"Replaying {backup_file} into {table} in batches of up to "
+          f"{batcher.target_bytes // 1000} KB / {batcher.max_rows} rows, {max_in_flight} in flight")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_file_path = os.path.join(OUTPUT_DIR, f"replay_log_{timestamp}.txt")
+    quarantine_path = os.path.join(OUTPUT_DIR, f"quarantine_{timestamp}.ndjson")
+
+    with open(log_file_path, 'w', encoding='utf-8') as log_file:
+        log_file.write(f"Replay of {backup_file} started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+        with ConcurrentUploader(SUPABASE_URL, SUPABASE_KEY, table, on_conflict=on_conflict,
+                                max_in_flight=max_in_flight, batcher=batcher, log_file=log_file,
+                                quarantine_path=quarantine_path,
+                                on_uploaded=journal.commit if journal is not None else None) as uploader:
+            successful_uploads, failed_uploads = uploader.upload(records)
+
+        if journal is not None:
+            print(journal.summary())
+            log_file.write(f"{journal.summary()}\n")
+
+        summary = f"\nReplay complete: {successful_uploads} successful, {failed_uploads} failed"
+        print(summary)
+        log_file.write(f"{summary}\n")
+
+    print(f"Replay log saved to {log_file_path}")
+    return successful_uploads, failed_uploads
+
+def parse_args():
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Upload a saved JSON/NDJSON backup to Supabase")
+    parser.add_argument("backup", help="Backup file (.ndjson, .ndjson.gz, .ndjson.zst or a legacy .json array)")
+    parser.add_argument("--table", default="product_inventory", help="Supabase table to upsert into")
+    parser.add_argument("--on-conflict", default=None,
+                        help="Column(s) to resolve upsert conflicts on, if not the primary key")
+    parser.add_argument("--key", default=None,
+                        help="Column identifying a row, used to journal and label batches "
+                             "(default: the --on-conflict column, else the table's primary key)")
+    parser.add_argument("--batch-bytes", type=int, default=DEFAULT_TARGET_BYTES,
+                        help="Initial serialized size budget per upload batch, in bytes")
+    parser.add_argument("--max-batch-rows", type=int, default=DEFAULT_MAX_ROWS,
+                        help="Maximum number of records per upload batch")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Number of upload batches sent concurrently")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip rows already committed by an interrupted replay of the same backup")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("Error: Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY environment variables.")
+        sys.exit(1)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    key = args.key or row_key(args.table, args.on_conflict)
+    batcher = AdaptiveBatcher(target_bytes=args.batch_bytes, max_rows=args.max_batch_rows, key=key)
+
+    # Replays are journaled against the backup's fingerprint, so an interrupted replay can be resumed
+    journal = UploadJournal(os.path.join(OUTPUT_DIR, "journal"), file_fingerprint(args.backup),
+                            table=args.table, key=key, resume=args.resume)
+
+    successful, failed = replay_backup(args.backup, table=args.table, on_conflict=args.on_conflict,
+                                       batcher=batcher, max_in_flight=args.max_in_flight, journal=journal,
+                                       key=key)
+    journal.close()
+
+    print(f"Process completed: {successful} records uploaded successfully, {failed} records failed.")
+    print(f"Check the output directory for logs: {OUTPUT_DIR}")
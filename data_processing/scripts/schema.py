@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import httpx
+
+# Seconds a cached schema description stays valid
+DEFAULT_SCHEMA_TTL = 24 * 60 * 60
+
+class SchemaCache:
+    """
+    Column lists of Supabase tables, read from the PostgREST OpenAPI description.
+
+    The description is fetched with a single GET of /rest/v1/ and cached
+    locally for ttl seconds, so most runs validate their columns without any
+    request, and none of them write to the database. Columns a fresh copy
+    confirmed missing are recorded with it, so they do not trigger another
+    fetch until the copy expires.
+    """
+
+    def __init__(self, supabase_url, supabase_key, cache_path, ttl=DEFAULT_SCHEMA_TTL):
+        self.supabase_url = supabase_url.rstrip('/')
+        self.supabase_key = supabase_key
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("url") != self.supabase_url or time.time() - cached.get("fetched_at", 0) > self.ttl:
+            return None
+        return cached
+
+    def _write_cache(self, cached):
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cached, f, ensure_ascii=False)
+
+    def _fetch(self):
+        response = httpx.get(
+            f"{self.supabase_url}/rest/v1/",
+            headers={
+                "apikey": self.supabase_key,
+                "Authorization": f"Bearer {self.supabase_key}",
+                "Accept": "application/openapi+json",
+            },
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        definitions = response.json().get("definitions", {})
+        tables = {name: sorted(definition.get("properties", {})) for name, definition in definitions.items()}
+        self._write_cache({"url": self.supabase_url, "fetched_at": time.time(), "tables": tables, "missing": {}})
+        return tables
+
+    def table_columns(self, table, refresh=False):
+        """
+        Return the set of columns of a table, or None if the table is unknown
+        """
+        cached = None if refresh else self._read_cache()
+        tables = cached["tables"] if cached is not None else None
+        if tables is None or table not in tables:
+            tables = self._fetch()
+        columns = tables.get(table)
+        return set(columns) if columns is not None else None
+
+    def confirmed_missing(self, table):
+        """
+        Return the columns of a table that the cached copy was fetched to confirm as missing
+        """
+        cached = self._read_cache()
+        return set(cached.get("missing", {}).get(table, ())) if cached is not None else set()
+
+    def record_missing(self, table, columns):
+        """
+        Record columns a fresh copy confirmed missing, for as long as that copy is cached
+        """
+        cached = self._read_cache()
+        if cached is not None:
+            cached.setdefault("missing", {})[table] = sorted(columns)
+            self._write_cache(cached)
+
+def check_columns(supabase_url, supabase_key, table, columns, cache_path, ttl=DEFAULT_SCHEMA_TTL):
+    """
+    Validate a column list against the cached table schema.
+
+    Returns the columns missing from the table, or None when the schema could
+    not be read (the upload then proceeds as before and reports its own errors).
+    Columns missing from a cached schema are confirmed against a fresh copy,
+    unless an earlier check already confirmed them while that copy is cached.
+    """
+    print(f"Checking columns of {table} against the Supabase schema...")
+    cache = SchemaCache(supabase_url, supabase_key, cache_path, ttl)
+    try:
+        existing = cache.table_columns(table)
+        if existing is not None:
+            confirmed = cache.confirmed_missing(table)
+            if any(col not in existing and col not in confirmed for col in columns):
+                # Columns may have been added since the schema was cached; confirm before dropping any
+                existing = cache.table_columns(table, refresh=True)
+                if existing is not None:
+                    cache.record_missing(table, [col for col in columns if col not in existing])
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"Warning: Could not read the Supabase schema: {str(e)}")
+        print("Will try to upload records anyway")
+        return None
+
+    if existing is None:
+        print(f"Warning: Table {table} was not found in the Supabase schema")
+        return None
+
+    missing = [col for col in columns if col not in existing]
+    if missing:
+        print(f"Warning: The following columns do not exist in {table} and will not be uploaded: {missing}")
+        print(f"(Delete {cache_path} to recheck them before the cached schema expires)")
+    else:
+        print(f"All {len(columns)} columns exist in {table}")
+    return missing
+
+def drop_columns(records, columns):
+    """
+    Lazily remove the given columns from every record
+    """
+    columns = set(columns)
+    for record in records:
+        yield {col: value for col, value in record.items() if col not in columns}
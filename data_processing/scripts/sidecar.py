@@ -0,0 +1,148 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+# The per-product JSON blobs kept out of the main table
+BLOB_COLUMNS = ['comments', 'questions']
+
+_MAGIC = b"BLOBSC1\n"
+_FOOTER = struct.Struct("<Q8s")
+_FOOTER_MAGIC = b"BLOBIDX1"
+
+class BlobSidecarWriter:
+    """
+    Write large per-product text cells to a compressed, offset-indexed side-car file.
+
+    Every cell is zlib-compressed on its own and appended to the file; the
+    index (product_id -> offset and length of each column's cell) is written
+    at the end, followed by a fixed-size footer pointing at it. A reader can
+    therefore load one product's cells with a single seek, without
+    decompressing anything else. The file is written under a .partial name
+    and renamed on a clean close.
+    """
+
+    def __init__(self, path, columns=BLOB_COLUMNS, level=6):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.columns = list(columns)
+        self.level = level
+        self.index = {}
+        self.raw_bytes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(self.partial_path, 'wb')
+        self.file.write(_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(complete=exc_type is None)
+
+    def _append(self, text):
+        if text is None:
+            return None
+        data = text.encode('utf-8')
+        self.raw_bytes += len(data)
+        compressed = zlib.compress(data, self.level)
+        offset = self.file.tell()
+        self.file.write(compressed)
+        return [offset, len(compressed)]
+
+    def write(self, product_id, cells):
+        """
+        Store the given column -> text cells of one product (None values are skipped)
+        """
+        self.index[str(product_id)] = [self._append(cells.get(col)) for col in self.columns]
+
+    def write_frame(self, df, key='product_id'):
+        """
+        Store the blob columns of every row of a DataFrame; missing values become None
+        """
+        columns = [col for col in self.columns if col in df.columns]
+        present = df[columns].notna().to_numpy()
+        values = df[columns].to_numpy(dtype=object)
+        for product_id, row, mask in zip(df[key].to_numpy(dtype=object), values, present):
+            self.write(product_id, {col: value for col, value, ok in zip(columns, row, mask) if ok})
+
+    def close(self, complete=True):
+        if self.file is None:
+            return
+        if complete:
+            index_offset = self.file.tell()
+            index = json.dumps({"columns": self.columns, "entries": self.index}, separators=(',', ':'))
+            self.file.write(zlib.compress(index.encode('utf-8'), self.level))
+            self.file.write(_FOOTER.pack(index_offset, _FOOTER_MAGIC))
+        self.file.close()
+        self.file = None
+        if complete:
+            os.replace(self.partial_path, self.path)
+
+    def summary(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return (f"Blob side-car: {len(self.index)} products, {self.raw_bytes / 2**20:.1f} MiB of "
+                f"{'/'.join(self.columns)} stored in {size / 2**20:.1f} MiB ({self.path})")
+
+class BlobSidecar:
+    """
+    Random-access reader for a side-car file written by BlobSidecarWriter.
+
+    Opening reads only the footer and the index; get() then costs one dict
+    lookup, one seek and the decompression of a single cell. get() may be
+    called from several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        if self.file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a blob side-car file")
+        self.file.seek(-_FOOTER.size, os.SEEK_END)
+        footer_offset = self.file.tell()
+        index_offset, magic = _FOOTER.unpack(self.file.read(_FOOTER.size))
+        if magic != _FOOTER_MAGIC:
+            raise ValueError(f"{path} has no index (was it written completely?)")
+        self.file.seek(index_offset)
+        index = json.loads(zlib.decompress(self.file.read(footer_offset - index_offset)))
+        self.columns = index["columns"]
+        self.entries = index["entries"]
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def __contains__(self, product_id):
+        return str(product_id) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, product_id, column):
+        """
+        Raw text of one product's cell, or None when it is missing
+        """
+        entry = self.entries.get(str(product_id))
+        if entry is None:
+            return None
+        location = entry[self.columns.index(column)]
+        if location is None:
+            return None
+        offset, length = location
+        with self.lock:
+            self.file.seek(offset)
+            data = self.file.read(length)
+        return zlib.decompress(data).decode('utf-8')
+
+    def load(self, product_id, column):
+        """
+        Parsed JSON of one product's cell (e.g. its list of comments), or None
+        """
+        text = self.get(product_id, column)
+        return json.loads(text) if text is not None else None
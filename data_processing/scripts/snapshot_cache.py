@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from csv_reader import COLUMN_DTYPES, NUMERIC_COLUMNS, read_csv_header, read_projected_csv
+from journal import file_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # optional: without pyarrow every read parses the CSV
+    pa = None
+
+# Bump when the layout of cached tables changes, so old cache files are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+# CSV rows parsed (and written as one Arrow record batch) at a time while building a cache file
+BUILD_CHUNK_SIZE = 10_000
+
+def _arrow_schema(columns):
+    return pa.schema([(col, pa.float64() if col in NUMERIC_COLUMNS else pa.string()) for col in columns])
+
+class SnapshotCache:
+    """
+    Typed copies of CSV snapshots in Arrow IPC format, so repeated runs skip CSV parsing.
+
+    Each snapshot is parsed once with the explicit dtypes of csv_reader and
+    written as an uncompressed Arrow file, which later runs memory-map and
+    project without copying. A cache entry is keyed by the source file's
+    size, mtime and SHA-256: size and mtime are checked first, and the file is
+    only hashed when its mtime changed, so a touched but identical snapshot
+    still hits. Any other change rebuilds the entry transparently.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.available = pa is not None
+
+    def _paths(self, csv_path):
+        source = os.path.abspath(csv_path)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        tag = hashlib.blake2b(source.encode('utf-8'), digest_size=4).hexdigest()
+        base = os.path.join(self.cache_dir, f"{stem}_{tag}")
+        return f"{base}.arrow", f"{base}.meta.json"
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("format_version") == CACHE_FORMAT_VERSION else None
+
+    def _write_meta(self, meta_path, meta):
+        with open(f"{meta_path}.partial", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(f"{meta_path}.partial", meta_path)
+
+    def lookup(self, csv_path):
+        """
+        Return the metadata of a valid cache entry for the CSV file, or None on a miss
+        """
+        table_path, meta_path = self._paths(csv_path)
+        meta = self._read_meta(meta_path)
+        if meta is None or not os.path.exists(table_path):
+            return None
+
+        stat = os.stat(csv_path)
+        if meta["size"] != stat.st_size:
+            return None
+        if meta["mtime_ns"] != stat.st_mtime_ns:
+            # Same size but touched: only the content hash can tell whether it changed
+            if file_fingerprint(csv_path) != meta["fingerprint"]:
+                return None
+            meta["mtime_ns"] = stat.st_mtime_ns
+            self._write_meta(meta_path, meta)
+        return meta
+
+    def build(self, csv_path):
+        """
+        Parse the CSV file in chunks and write its typed table to the cache
+        """
+        for _ in self._build_chunks(csv_path, BUILD_CHUNK_SIZE):
+            pass
+        return self._read_meta(self._paths(csv_path)[1])
+
+    def _build_chunks(self, csv_path, chunksize):
+        """
+        Parse the CSV file in chunks, appending each one to the cache file as it
+        passes, and yield the chunks. The entry only becomes valid (renamed and
+        described by its metadata) once every chunk has been written; a caller
+        that stops early leaves no cache entry behind.
+        """
+        table_path, meta_path = self._paths(csv_path)
+        partial_path = f"{table_path}.partial"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        print(f"Building snapshot cache for {csv_path}...")
+        start = time.perf_counter()
+
+        stat = os.stat(csv_path)
+        columns = [col for col in read_csv_header(csv_path) if col in COLUMN_DTYPES]
+        schema = _arrow_schema(columns)
+        rows = 0
+        complete = False
+        try:
+            with pa.OSFile(partial_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    for chunk in read_projected_csv(csv_path, columns, chunksize=chunksize):
+                        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                        rows += len(chunk)
+                        yield chunk
+            complete = True
+        finally:
+            if not complete and os.path.exists(partial_path):
+                os.remove(partial_path)
+        os.replace(partial_path, table_path)
+
+        meta = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "source": os.path.abspath(csv_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "fingerprint": file_fingerprint(csv_path),
+            "columns": columns,
+            "rows": rows,
+            "built_at": datetime.now().isoformat(),
+        }
+        self._write_meta(meta_path, meta)
+        print(f"Cached {rows} rows in {table_path} ({time.perf_counter() - start:.1f} s)")
+
+    def fingerprint(self, csv_path):
+        """
+        Fingerprint of the CSV file, taken from a valid cache entry when there is one
+        """
+        meta = self.lookup(csv_path) if self.available else None
+        return meta["fingerprint"] if meta is not None else file_fingerprint(csv_path)
+
+    def read(self, csv_path, columns, chunksize=None):
+        """
+        Read the requested columns of a CSV snapshot, like read_projected_csv.
+
+        Served from the memory-mapped cache, (re)building it on a miss. A chunked
+        read that misses is served from the build itself, chunk by chunk, as the
+        cache file is written. Falls back to parsing the CSV when pyarrow is not
+        installed or a requested column is not cached.
+        """
+        if not self.available:
+            return read_projected_csv(csv_path, columns, chunksize=chunksize)
+
+        # Every known column in the CSV header is cached, so only unknown columns need the CSV
+        if any(col not in COLUMN_DTYPES for col in columns):
+            return read_projected_csv(csv_path, columns, chunksize=chunksize)
+
+        meta = self.lookup(csv_path)
+        if meta is None:
+            if chunksize is not None:
+                # Stream the chunks while the cache is written, so the first one is not held back by the build
+                return self._build_and_project(csv_path, columns, chunksize)
+            meta = self.build(csv_path)
+
+        table_path, _ = self._paths(csv_path)
+        table = pa.ipc.open_file(pa.memory_map(table_path)).read_all()
+        table = table.select([col for col in columns if col in meta["columns"]])
+        if chunksize is None:
+            return table.to_pandas()
+        return (pa.Table.from_batches([batch]).to_pandas() for batch in table.to_batches(max_chunksize=chunksize))
+
+    def _build_and_project(self, csv_path, columns, chunksize):
+        for chunk in self._build_chunks(csv_path, chunksize):
+            yield chunk[[col for col in columns if col in chunk.columns]]
+
+def read_snapshot(csv_path, columns, chunksize=None, cache_dir=None):
+    """
+    Read the requested columns of a CSV snapshot through the cache in cache_dir,
+    or straight from the CSV when cache_dir is None
+    """
+    if cache_dir is None:
+        return read_projected_csv(csv_path, columns, chunksize=chunksize)
+    return SnapshotCache(cache_dir).read(csv_path, columns, chunksize=chunksize)
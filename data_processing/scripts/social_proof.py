@@ -0,0 +1,72 @@
+import pandas as pd
+
+SOCIAL_PROOF_SLOTS = ['social_proof_1', 'social_proof_2', 'social_proof_3', 'social_proof_4']
+
+# Engagement counters parsed from the social proof texts, and the phrase each one is read from:
+#   "3959 kişi favoriledi!", "12.3B kişi favoriledi!"  -> favorite_count
+#   "3 günde 1234 kişi ekledi!"                         -> cart_count
+#   "24 saatte 12345 kişi inceledi!"                    -> view_count
+#   "Son 3 günde 500+ ürün satıldı!"                    -> sold_count
+_NUMBER = r'(?P<number>\d+(?:[.,]\d+)?)\s*(?P<unit>B|M)?\+?'
+SOCIAL_PROOF_PATTERNS = {
+    'favorite_count': _NUMBER + r'\s+kişi\s+favoriledi',
+    'cart_count': _NUMBER + r'\s+kişi\s+(?:sepetine\s+)?ekledi',
+    'view_count': _NUMBER + r'\s+kişi\s+inceledi',
+    'sold_count': _NUMBER + r'\s+ürün\s+satıldı',
+}
+SOCIAL_PROOF_COLUMNS = list(SOCIAL_PROOF_PATTERNS)
+
+# Run once in the Supabase SQL editor so the counters are uploaded and can be sorted on
+SOCIAL_PROOF_COLUMNS_DDL = "\n" + "".join(
+    f"ALTER TABLE product_inventory ADD COLUMN IF NOT EXISTS {col} INTEGER;\n"
+    f"CREATE INDEX IF NOT EXISTS product_inventory_{col}_idx ON product_inventory ({col});\n"
+    for col in SOCIAL_PROOF_COLUMNS
+)
+
+# "12.3B" means 12,300: B is bin (thousand), M is milyon
+_UNITS = {'B': 1_000, 'M': 1_000_000}
+
+def _parse_counts(matches):
+    """
+    Turn extracted (number, unit) pairs into integer counts
+    """
+    unit = matches['unit'].map(_UNITS).astype('Float64').fillna(1)
+    # With a unit the separator is a decimal point ("12.3B"); without one it groups thousands ("1.234")
+    number = matches['number'].where(unit != 1, matches['number'].str.replace('.', '', regex=False))
+    value = pd.to_numeric(number.str.replace(',', '.', regex=False), errors='coerce').astype('Float64')
+    return (value * unit).round().astype('Int64')
+
+def parse_social_proof(df):
+    """
+    Parse the social proof slots of a frame into engagement counters.
+
+    Each counter is extracted from every slot with a vectorized regex and the
+    largest value across slots is kept. Returns a DataFrame of Int64 columns
+    (favorite_count, cart_count, view_count, sold_count) aligned with df;
+    counters no slot mentions are <NA>.
+    """
+    slots = [df[col].astype('string') for col in SOCIAL_PROOF_SLOTS if col in df.columns]
+    counters = {}
+    for column, pattern in SOCIAL_PROOF_PATTERNS.items():
+        counts = [_parse_counts(slot.str.extract(pattern)) for slot in slots]
+        counters[column] = pd.concat(counts, axis=1).max(axis=1).astype('Int64') if counts else pd.NA
+    return pd.DataFrame(counters, index=df.index)
+
+def drop_duplicate_slots(df):
+    """
+    Blank out social proof slots that repeat the text of an earlier slot
+    """
+    df = df.copy()
+    present = [col for col in SOCIAL_PROOF_SLOTS if col in df.columns]
+    for position, col in enumerate(present):
+        for earlier in present[:position]:
+            df[col] = df[col].mask(df[col].notna() & (df[col] == df[earlier]))
+    return df
+
+def add_social_proof_columns(df):
+    """
+    Return a copy of the frame with engagement counters parsed and duplicate slots removed
+    """
+    if not any(col in df.columns for col in SOCIAL_PROOF_SLOTS):
+        return df
+    return pd.concat([drop_duplicate_slots(df), parse_social_proof(df)], axis=1)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from coercion import frame_to_records
+from price import add_price_columns
+from ratings import rating_features, STAR_COLUMNS
+
+SUMMARY_TABLE = 'subcategory_summary'
+
+# CSV columns the aggregates are computed from
+SUMMARY_INPUT_COLUMNS = ['product_id', 'name', 'subcategory', 'price', 'rating_count'] + STAR_COLUMNS
+
+# Price percentiles kept per subcategory, in kuruş
+PRICE_PERCENTILES = {'price_p10': 0.10, 'price_p25': 0.25, 'price_median': 0.50,
+                     'price_p75': 0.75, 'price_p90': 0.90}
+
+# Number of best-scored products listed per subcategory
+DEFAULT_TOP_N = 10
+
+SUMMARY_COLUMNS = (
+    ['subcategory', 'product_count', 'priced_count', 'price_min', 'price_max', 'price_mean']
+    + list(PRICE_PERCENTILES)
+    + ['rated_count', 'rating_mean', 'bayesian_rating_mean'] + STAR_COLUMNS + ['top_products']
+)
+
+# Run once in the Supabase SQL editor before the first summary upload
+SUBCATEGORY_SUMMARY_DDL = """
+CREATE TABLE IF NOT EXISTS subcategory_summary (
+    subcategory TEXT PRIMARY KEY,
+    product_count INTEGER NOT NULL,
+    priced_count INTEGER NOT NULL,
+    price_min BIGINT,
+    price_max BIGINT,
+    price_mean BIGINT,
+    price_p10 BIGINT,
+    price_p25 BIGINT,
+    price_median BIGINT,
+    price_p75 BIGINT,
+    price_p90 BIGINT,
+    rated_count INTEGER NOT NULL,
+    rating_mean DOUBLE PRECISION,
+    bayesian_rating_mean DOUBLE PRECISION,
+    star_1_count BIGINT,
+    star_2_count BIGINT,
+    star_3_count BIGINT,
+    star_4_count BIGINT,
+    star_5_count BIGINT,
+    top_products JSONB
+);
+"""
+
+def _rounded_int(series):
+    return series.round().astype('Int64')
+
+def subcategory_aggregates(df, top_n=DEFAULT_TOP_N):
+    """
+    Compute per-subcategory aggregates from a frame of CSV rows.
+
+    All statistics come from one groupby over the frame: product count, price
+    range, mean and percentiles (in kuruş), rating distribution (summed star
+    counts) and mean ratings. top_products lists the top_n products by
+    bayesian_rating (ties broken by rating_count) as {product_id, name,
+    price_amount, bayesian_rating} objects. Returns JSON-native records keyed
+    by subcategory, sorted by subcategory so their hashes are stable.
+    """
+    df = df[df['subcategory'].notna()]
+    df = add_price_columns(df)
+    frame = pd.DataFrame({
+        'subcategory': df['subcategory'].astype('string'),
+        'product_id': df['product_id'].astype('string'),
+        'name': df['name'].astype('string'),
+        'price_amount': df['price_amount'].astype('Float64'),
+        'rating_count': pd.to_numeric(df['rating_count'], errors='coerce').astype('Float64'),
+        'bayesian_rating': rating_features(df)['bayesian_rating'],
+    }, index=df.index)
+    stars = df.reindex(columns=STAR_COLUMNS).apply(pd.to_numeric, errors='coerce').fillna(0)
+    weights = stars.to_numpy(dtype='float64')
+    frame[STAR_COLUMNS] = weights
+    # Per-product star total and sum of stars, so the group mean rating is one sum ratio
+    frame['star_total'] = weights.sum(axis=1)
+    frame['star_points'] = weights @ np.arange(1, 6, dtype='float64')
+
+    groups = frame.groupby('subcategory', sort=True)
+    summary = groups.agg(
+        product_count=('product_id', 'size'),
+        priced_count=('price_amount', 'count'),
+        price_min=('price_amount', 'min'),
+        price_max=('price_amount', 'max'),
+        price_mean=('price_amount', 'mean'),
+        rated_count=('bayesian_rating', 'count'),
+        bayesian_rating_mean=('bayesian_rating', 'mean'),
+        star_total=('star_total', 'sum'),
+        star_points=('star_points', 'sum'),
+        **{col: (col, 'sum') for col in STAR_COLUMNS},
+    )
+    percentiles = groups['price_amount'].quantile(list(PRICE_PERCENTILES.values())).unstack()
+    percentiles.columns = list(PRICE_PERCENTILES)
+    summary = summary.join(percentiles)
+
+    for col in ['price_min', 'price_max', 'price_mean'] + list(PRICE_PERCENTILES):
+        summary[col] = _rounded_int(summary[col].astype('Float64'))
+    for col in STAR_COLUMNS:
+        summary[col] = summary[col].astype('Int64')
+    summary['rating_mean'] = (summary['star_points'] / summary['star_total'].where(summary['star_total'] > 0)
+                              ).astype('Float64').round(4)
+    summary['bayesian_rating_mean'] = summary['bayesian_rating_mean'].astype('Float64').round(4)
+
+    # Top-N: one sort of the whole frame, then the first rows of every group
+    ranked = frame[frame['bayesian_rating'].notna()].sort_values(
+        ['subcategory', 'bayesian_rating', 'rating_count', 'product_id'],
+        ascending=[True, False, False, True], na_position='last',
+    )
+    top = ranked.groupby('subcategory', sort=False).head(top_n)
+    top_records = frame_to_records(top[['product_id', 'name', 'price_amount', 'bayesian_rating']].assign(
+        price_amount=_rounded_int(top['price_amount'])))
+    top_products = {}
+    for subcategory, record in zip(top['subcategory'].to_numpy(dtype=object), top_records):
+        top_products.setdefault(subcategory, []).append(record)
+
+    summary = summary.reset_index()
+    records = frame_to_records(summary[[col for col in SUMMARY_COLUMNS if col != 'top_products']])
+    for record in records:
+        record['top_products'] = top_products.get(record['subcategory'], [])
+    return records
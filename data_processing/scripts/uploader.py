@@ -0,0 +1,326 @@
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import httpx
+
+from batching import AdaptiveBatcher
+from ratelimit import AimdRateLimiter, parse_retry_after
+
+# Number of batches sent to PostgREST at the same time
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Seconds to wait for a single batch request
+DEFAULT_TIMEOUT = 60.0
+
+# Times a throttled (429/5xx) or dropped batch is re-sent before it counts as failed
+DEFAULT_MAX_RETRIES = 5
+
+# How much the server sends back per upsert:
+#   'minimal'        - nothing but the status and an exact affected-row count (Content-Range)
+#   'representation' - every upserted row echoed back, as supabase-py does by default
+RETURN_MINIMAL = 'minimal'
+RETURN_REPRESENTATION = 'representation'
+
+PREFER_HEADERS = {
+    RETURN_MINIMAL: "resolution=merge-duplicates,return=minimal,count=exact",
+    RETURN_REPRESENTATION: "resolution=merge-duplicates,return=representation",
+}
+
+def affected_rows(response):
+    """
+    Affected-row count from a PostgREST Content-Range header ("*/42"), or None
+    """
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+# Statuses PostgREST answers with when the data of a row is rejected
+ROW_ERROR_STATUSES = (400, 409, 422)
+
+# Postgres SQLSTATE classes caused by row content: 22 data exception, 23 integrity constraint violation
+ROW_ERROR_SQLSTATE_CLASSES = ('22', '23')
+
+# Statuses every later batch would get as well: bad credentials or an unknown table
+FATAL_STATUSES = (401, 403, 404)
+
+def is_throttled(status_code):
+    """
+    Whether a response status means the backend is overloaded rather than the batch being bad
+    """
+    return status_code == 429 or status_code >= 500
+
+def error_code(response):
+    """
+    The "code" of a PostgREST error body (a Postgres SQLSTATE or a PGRSTxxx code), or None
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    code = body.get("code") if isinstance(body, dict) else None
+    return str(code) if code is not None else None
+
+def is_row_error(response):
+    """
+    Whether a batch was rejected because of the content of (some of) its rows
+    """
+    code = error_code(response)
+    return (response.status_code in ROW_ERROR_STATUSES and code is not None and len(code) == 5
+            and code.startswith(ROW_ERROR_SQLSTATE_CLASSES))
+
+def is_fatal_error(response):
+    """
+    Whether an error would repeat for every batch: auth, not found, or a PGRST2xx schema error
+    (e.g. PGRST204, a column missing from the schema cache)
+    """
+    code = error_code(response) or ""
+    return response.status_code in FATAL_STATUSES or code.startswith("PGRST2")
+
+class ConcurrentUploader:
+    """
+    Upsert records into a Supabase table through PostgREST with several batches in flight.
+
+    All requests share one keep-alive HTTP session. Batches are sent from a
+    thread pool, paced by an AIMD rate limiter, while progress logging,
+    success/failure accounting and batch size feedback happen on the calling
+    thread as requests complete. Throttled batches are re-sent once the rate
+    limiter allows it.
+
+    A batch rejected for its content (400/409/422 with a Postgres data or
+    constraint error, SQLSTATE class 22 or 23) is split in half and both
+    halves are re-sent, recursively, until the offending rows are isolated.
+    Those rows are appended to quarantine_path as JSON lines along with the
+    server error, and every other row in the batch is still uploaded.
+    Any other rejection fails the batch as a whole; auth, not-found and
+    schema errors (which every batch would hit) also stop the upload.
+
+    on_uploaded, when given, is called on the calling thread with every batch
+    (or bisected part of one) the server accepted.
+
+    A batch counts as accepted when the status is 2xx and the server reports
+    as many affected rows as were sent: from the Content-Range count in
+    'minimal' mode (the default, which avoids echoing rows back), or from
+    the number of returned rows in 'representation' mode.
+    """
+
+    def __init__(self, supabase_url, supabase_key, table, on_conflict=None,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, batcher=None, log_file=None,
+                 timeout=DEFAULT_TIMEOUT, rate_limiter=None, max_retries=DEFAULT_MAX_RETRIES,
+                 quarantine_path=None, on_uploaded=None, return_mode=RETURN_MINIMAL):
+        self.endpoint = f"{supabase_url.rstrip('/')}/rest/v1/{table}"
+        self.params = {"on_conflict": on_conflict} if on_conflict else {}
+        self.max_in_flight = max_in_flight
+        self.batcher = batcher or AdaptiveBatcher()
+        self.rate_limiter = rate_limiter or AimdRateLimiter()
+        self.max_retries = max_retries
+        self.log_file = log_file
+        self.quarantine_path = quarantine_path
+        self.on_uploaded = on_uploaded
+        self.return_mode = return_mode
+        self.client = httpx.Client(
+            headers={
+                "apikey": supabase_key,
+                "Authorization": f"Bearer {supabase_key}",
+                "Content-Type": "application/json",
+                "Prefer": PREFER_HEADERS[return_mode],
+            },
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+        self.successful = 0
+        self.failed = 0
+        self.quarantined = 0
+        # Error that stopped the upload, if any
+        self.stopped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.client.close()
+
+    def _log(self, message):
+        print(message)
+        if self.log_file is not None:
+            self.log_file.write(f"{message}\n")
+
+    def _send(self, batch):
+        """
+        POST one Batch; runs on a worker thread and returns (response, elapsed seconds).
+        The pre-encoded body is sent as-is, so retries never serialize the rows again.
+        """
+        self.rate_limiter.acquire()
+        start = time.perf_counter()
+        response = self.client.post(self.endpoint, params=self.params, content=batch.body)
+        return response, time.perf_counter() - start
+
+    def _quarantine(self, label, record, error):
+        """
+        Record a row the server rejected on its own
+        """
+        self.quarantined += 1
+        if self.quarantine_path is None:
+            return
+        entry = {
+            "batch": label,
+            "key": record.get(self.batcher.key),
+            "error": error,
+            "quarantined_at": datetime.now().isoformat(),
+            "record": record,
+        }
+        with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _verify(self, response, batch):
+        """
+        Check a 2xx response against the batch; returns an error message or None
+        """
+        if self.return_mode == RETURN_REPRESENTATION:
+            try:
+                count = len(response.json())
+            except ValueError:
+                return f"HTTP {response.status_code} with an unreadable body"
+        else:
+            count = affected_rows(response)
+            if count is None:
+                # Older PostgREST versions omit the count; the status code has to do
+                return None
+        if count != len(batch):
+            return f"HTTP {response.status_code} but {count} of {len(batch)} rows affected"
+        return None
+
+    def _finish(self, label, batch, attempt, future):
+        """
+        Account for a completed batch request.
+        Returns a list of (label, batch, attempt) tuples that still need to be sent.
+        """
+        try:
+            response, elapsed = future.result()
+        except Exception as e:
+            self.rate_limiter.on_throttle()
+            self.batcher.record_latency(0, success=False)
+            if attempt < self.max_retries:
+                self._log(f"Exception in batch {label} [{batch.key_range}]: {str(e)} (retrying)")
+                return [(label, batch, attempt + 1)]
+            self._log(f"Exception in batch {label} [{batch.key_range}]: {str(e)}")
+            self.failed += len(batch)
+            return []
+
+        error = self._verify(response, batch) if response.is_success else None
+        if response.is_success and error is None:
+            self.rate_limiter.on_success()
+            self._log(f"Successfully uploaded batch {label}")
+            self.successful += len(batch)
+            self.batcher.record_latency(elapsed)
+            if self.on_uploaded is not None:
+                self.on_uploaded(batch)
+            return []
+
+        error = error or f"HTTP {response.status_code} {response.text[:500]}"
+        if is_throttled(response.status_code):
+            self.batcher.record_latency(elapsed, success=False)
+            self.rate_limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+            if attempt < self.max_retries:
+                self._log(f"Batch {label} throttled: {error} (retrying)")
+                return [(label, batch, attempt + 1)]
+            self._log(f"Error in batch {label} [{batch.key_range}]: {error}")
+            self.failed += len(batch)
+            return []
+
+        if not response.is_success and not is_row_error(response):
+            # Not caused by a row (auth, unknown table or column, ...): splitting would only
+            # multiply the same error, so the batch fails as a whole and nothing is quarantined
+            self.failed += len(batch)
+            if is_fatal_error(response):
+                if self.stopped is None:
+                    self._log(f"Error in batch {label} [{batch.key_range}]: {error} (stopping the upload)")
+                self.stopped = error
+            else:
+                self._log(f"Error in batch {label} [{batch.key_range}]: {error}")
+            return []
+
+        # The batch content was rejected (or only partly applied): bisect to isolate the offending rows.
+        # Halves go through the same rate limiter, so bisection cannot outpace the backend,
+        # and reuse the already encoded rows.
+        if len(batch) > 1:
+            self._log(f"Error in batch {label} [{batch.key_range}]: {error} "
+                      f"(splitting {len(batch)} records to isolate bad rows)")
+            first, second = batch.split()
+            return [(f"{label}.1", first, attempt), (f"{label}.2", second, attempt)]
+
+        self._log(f"Error in batch {label} [{batch.key_range}]: {error} (record quarantined)")
+        self._quarantine(label, batch.records[0], error)
+        self.failed += 1
+        return []
+
+    def encode_batches(self, records):
+        """
+        Pack records into Batch objects, each carrying its encoded request body.
+        Encoding runs wherever the iterator is consumed, e.g. on a pipeline stage thread.
+        """
+        return self.batcher.batches(records)
+
+    def upload(self, records, total_records=None):
+        """
+        Upload an iterable of records and return (successful, failed) record counts
+        """
+        return self.upload_batches(self.encode_batches(records), total_records=total_records)
+
+    def upload_batches(self, batches, total_records=None):
+        """
+        Send Batch objects from encode_batches and return (successful, failed) record counts.
+        If the upload stops, the rows never sent count as failed: from total_records
+        when it is known, otherwise by draining the remaining batches, which also
+        lets any backup tee upstream see every record.
+        """
+        batches = iter(batches)
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+
+            def submit(label, batch, attempt):
+                pending[executor.submit(self._send, batch)] = (label, batch, attempt)
+
+            def drain():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    label, batch, attempt = pending.pop(future)
+                    for retry in self._finish(label, batch, attempt, future):
+                        submit(*retry)
+
+            submitted = unsent = 0
+            for batch_num, batch in enumerate(batches, start=1):
+                if self.stopped is not None:
+                    unsent = len(batch)
+                    break
+                submitted += len(batch)
+                progress = f"{submitted}" if total_records is None else f"{submitted}/{total_records}"
+                self._log(f"Processing batch {batch_num} [{batch.key_range}] "
+                          f"({len(batch)} records, {batch.size} bytes, {progress} total)")
+
+                submit(str(batch_num), batch, 0)
+
+                # Keep at most max_in_flight requests outstanding
+                while len(pending) >= self.max_in_flight:
+                    drain()
+
+            while pending:
+                drain()
+
+        if self.stopped is not None:
+            # Rows that were never sent count as failed
+            if total_records is None:
+                unsent += sum(len(batch) for batch in batches)
+            else:
+                unsent = max(0, total_records - submitted)
+            self.failed += unsent
+            self._log(f"Upload stopped after {submitted} records were sent: {self.stopped}")
+
+        if self.quarantined and self.quarantine_path is not None:
+            self._log(f"{self.quarantined} rejected records written to {self.quarantine_path}")
+
+        return self.successful, self.failed
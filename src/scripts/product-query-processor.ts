@@ -37,6 +37,8 @@ interface ProductPayload {
   product_id: string;
   name: string;
   price?: string;
+  price_amount?: number; // Parsed price in kuruş (1/100 TL), set at ingest
+  currency?: string;
   subcategory?: string;
   description?: string;
   extra_description?: string;
@@ -115,6 +117,21 @@ function buildQdrantFilter(options: any): any {
     });
   }
   
+  // Price range on the numeric price_amount payload field (kuruş), evaluated by Qdrant.
+  // Points written before price_amount existed (or with an unparseable price) have no
+  // value; they are kept here and checked by applyPriceFilter on the display price.
+  if (options.minPrice || options.maxPrice) {
+    const range: any = {};
+    if (options.minPrice) range.gte = options.minPrice * 100;
+    if (options.maxPrice) range.lte = options.maxPrice * 100;
+    conditions.push({
+      should: [
+        { key: 'price_amount', range },
+        { is_empty: { key: 'price_amount' } }
+      ]
+    });
+  }
+  
   if (conditions.length === 0) {
     return undefined;
   }
@@ -203,7 +220,10 @@ function applyPriceFilter(results: any[], minPrice?: number, maxPrice?: number):
     if (!result.payload) return false;
     
     const payload = result.payload as ProductPayload;
-    const price = parsePriceToNumber(payload.price);
+    // Prefer the price parsed at ingest; only older payloads need the display string parsed
+    const price = typeof payload.price_amount === 'number'
+      ? payload.price_amount / 100
+      : parsePriceToNumber(payload.price);
     if (!price) return false;
     
     if (minPrice && price < minPrice) return false;
@@ -215,6 +215,8 @@ async function uploadToQdrant() {
       product_id: product.product_id,
       name: product.name,
       price: product.price,
+      price_amount: product.price_amount ?? null, // Integer kuruş, for range filters
+      currency: product.currency ?? null,
       subcategory: product.subcategory,
       rating: product.rating,
       url: product.url,
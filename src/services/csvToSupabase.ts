@@ -6,12 +6,18 @@ export interface ProductInventory {
   name: string;
   url: string;
   price: string;
+  price_amount?: number | null; // Price in kuruş (1/100 TL), parsed from price at ingest
+  currency?: string | null; // ISO 4217 code, e.g. "TRY"
   rating: number | null;
   rating_count: number | null;
   social_proof_1: string | null;
   social_proof_2: string | null;
   social_proof_3: string | null;
   social_proof_4: string | null;
+  favorite_count?: number | null; // Counters parsed from the social proof texts at ingest
+  cart_count?: number | null;
+  view_count?: number | null;
+  sold_count?: number | null;
   subcategory: string;
   description: string;
   extra_description: string | null;